@@ -100,10 +100,15 @@ export async function getProfileCompletion(studentId) {
   }
 }
 
-export async function getMatchedInternships(studentId, filters = {}) {
+// Get a page of matched internships for a student ({ items, next })
+export async function getMatchedInternships(studentId, filters = {}, next = null) {
   // Build query string from filters
   const queryParams = new URLSearchParams();
   
+  if (next) {
+    queryParams.append('cursor_score', next.cursor_score);
+    queryParams.append('cursor_id', next.cursor_id);
+  }
   if (filters.location) queryParams.append('location', filters.location);
   if (filters.company) queryParams.append('company', filters.company);
   if (filters.skill) queryParams.append('skill', filters.skill);
@@ -129,6 +134,31 @@ export async function getNonMatchedInternships(studentId, filters = {}) {
   
   const r = await fetch(`${API}/search/non-matches/${studentId}${queryString}`);
   if (!r.ok) throw new Error("Failed to fetch non-matched internships");
+  // Response is NDJSON: one internship object per line
+  const body = await r.text();
+  return body.split("\n").filter(Boolean).map((line) => JSON.parse(line));
+}
+
+// Get a page of matched and non-matched internships for a student ({ items, next })
+// (matched first; match_score is null for non-matches)
+export async function getStudentInternships(studentId, filters = {}, next = null) {
+  // Build query string from filters
+  const queryParams = new URLSearchParams();
+  
+  if (filters.location) queryParams.append('location', filters.location);
+  if (filters.company) queryParams.append('company', filters.company);
+  if (filters.skill) queryParams.append('skill', filters.skill);
+  if (filters.search) queryParams.append('search', filters.search);
+  if (next) {
+    // cursor_score is null once the page is past the matched internships
+    if (next.cursor_score !== null) queryParams.append('cursor_score', next.cursor_score);
+    queryParams.append('cursor_id', next.cursor_id);
+  }
+  
+  const queryString = queryParams.toString() ? `?${queryParams.toString()}` : '';
+  
+  const r = await fetch(`${API}/search/internships/${studentId}${queryString}`);
+  if (!r.ok) throw new Error("Failed to fetch internships");
   return r.json();
 }
 
@@ -207,9 +237,15 @@ export async function getCompanyInfo(companyId) {
   return r.json();
 }
 
-// Get company internships
-export async function getCompanyInternships(companyId) {
-  const r = await fetch(`${API}/companies/${companyId}/internships`);
+// Get a page of company internships ({ items, next })
+export async function getCompanyInternships(companyId, next = null) {
+  const queryParams = new URLSearchParams();
+  if (next) {
+    queryParams.append('cursor', next.cursor);
+    queryParams.append('cursor_id', next.cursor_id);
+  }
+  const queryString = queryParams.toString() ? `?${queryParams.toString()}` : '';
+  const r = await fetch(`${API}/companies/${companyId}/internships${queryString}`);
   if (!r.ok) throw new Error("Failed to fetch company internships");
   return r.json();
 }
@@ -249,7 +285,9 @@ export async function updateInternshipStatus(internshipId, status) {
 export async function getInternshipCandidates(internshipId) {
   const r = await fetch(`${API}/internships/${internshipId}/candidates`);
   if (!r.ok) throw new Error("Failed to fetch candidates for internship");
-  return r.json();
+  // Response is NDJSON: one candidate object per line
+  const body = await r.text();
+  return body.split("\n").filter(Boolean).map((line) => JSON.parse(line));
 }
 
 
@@ -9,7 +9,7 @@ import { Checkbox } from "@/components/ui/checkbox"
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select"
 import { PortalNav } from "@/components/navigation/portal-nav"
 import { Search, MapPin, Building2, Moon, Coins, Users, Filter, AlertCircle, Loader2 } from "lucide-react"
-import { getMatchedInternships, getNonMatchedInternships, getSearchFilterOptions } from "@/app/api"
+import { getStudentInternships, getSearchFilterOptions } from "@/app/api"
 import { Alert, AlertDescription } from "@/components/ui/alert"
 import { useRouter } from "next/navigation"
 
@@ -28,6 +28,11 @@ interface Internship {
   match_score?: number
 }
 
+interface InternshipCursor {
+  cursor_score: number | null
+  cursor_id: number
+}
+
 export default function CandidateSearchPage() {
   const router = useRouter()
   const [searchQuery, setSearchQuery] = useState("")
@@ -39,6 +44,8 @@ export default function CandidateSearchPage() {
   // Data states
   const [matchedInternships, setMatchedInternships] = useState<Internship[]>([])
   const [nonMatchedInternships, setNonMatchedInternships] = useState<Internship[]>([])
+  const [nextPage, setNextPage] = useState<InternshipCursor | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [filterOptions, setFilterOptions] = useState({
     locations: [],
     companies: [],
@@ -77,13 +84,11 @@ export default function CandidateSearchPage() {
         const options = await getSearchFilterOptions()
         setFilterOptions(options)
         
-        // Fetch matched internships
-        const matched = await getMatchedInternships(parsedUser.student_id)
-        setMatchedInternships(matched)
-        
-        // Fetch non-matched internships
-        const nonMatched = await getNonMatchedInternships(parsedUser.student_id)
-        setNonMatchedInternships(nonMatched)
+        // Fetch the first page of matched and non-matched internships in one request
+        const { items, next } = await getStudentInternships(parsedUser.student_id)
+        setMatchedInternships(items.filter((i: Internship) => i.match_score !== null))
+        setNonMatchedInternships(items.filter((i: Internship) => i.match_score === null))
+        setNextPage(next)
       } catch (err) {
         console.error("Error fetching internships:", err)
         setError("Failed to load internships. Please try again later.")
@@ -95,6 +100,44 @@ export default function CandidateSearchPage() {
     fetchData()
   }, [router])
   
+  // Filters as sent to the search endpoint
+  const currentFilters = () => ({
+    search: searchQuery || undefined,
+    location: selectedLocations.length === 1 ? selectedLocations[0] : undefined,
+    company: selectedCompanies.length === 1 ? selectedCompanies[0] : undefined,
+    skill: selectedSkills.length === 1 ? selectedSkills[0] : undefined
+  })
+  
+  // Sort matched internships
+  const sortMatched = (matched: Internship[]) => [...matched].sort((a, b) => {
+    if (sortBy === "match-score") return (b.match_score || 0) - (a.match_score || 0)
+    if (sortBy === "company") return a.org_name.localeCompare(b.org_name)
+    return 0
+  })
+  
+  // Sort non-matched internships
+  const sortNonMatched = (nonMatched: Internship[]) => [...nonMatched].sort((a, b) => {
+    if (sortBy === "company") return a.org_name.localeCompare(b.org_name)
+    return 0
+  })
+  
+  // Append the next page of results (the endpoint is keyset-paginated)
+  const handleLoadMore = async () => {
+    if (!user || !nextPage) return
+    try {
+      setLoadingMore(true)
+      const { items, next } = await getStudentInternships(user.student_id, currentFilters(), nextPage)
+      setMatchedInternships(prev => sortMatched([...prev, ...items.filter((i: Internship) => i.match_score !== null)]))
+      setNonMatchedInternships(prev => sortNonMatched([...prev, ...items.filter((i: Internship) => i.match_score === null)]))
+      setNextPage(next)
+    } catch (err) {
+      console.error("Error loading more internships:", err)
+      setError("Failed to load more internships. Please try again.")
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+  
   // Apply filters when they change
   useEffect(() => {
     if (!user) return
@@ -103,36 +146,11 @@ export default function CandidateSearchPage() {
       try {
         setLoading(true)
         
-        // Build filter object
-        const filters = {
-          search: searchQuery || undefined,
-          location: selectedLocations.length === 1 ? selectedLocations[0] : undefined,
-          company: selectedCompanies.length === 1 ? selectedCompanies[0] : undefined,
-          skill: selectedSkills.length === 1 ? selectedSkills[0] : undefined
-        }
-        
-        // Fetch filtered matched internships
-        const matched = await getMatchedInternships(user.student_id, filters)
-        
-        // Sort matched internships
-        const sortedMatched = [...matched].sort((a, b) => {
-          if (sortBy === "match-score") return (b.match_score || 0) - (a.match_score || 0)
-          if (sortBy === "company") return a.org_name.localeCompare(b.org_name)
-          return 0
-        })
-        
-        setMatchedInternships(sortedMatched)
-        
-        // Fetch filtered non-matched internships
-        const nonMatched = await getNonMatchedInternships(user.student_id, filters)
-        
-        // Sort non-matched internships
-        const sortedNonMatched = [...nonMatched].sort((a, b) => {
-          if (sortBy === "company") return a.org_name.localeCompare(b.org_name)
-          return 0
-        })
-        
-        setNonMatchedInternships(sortedNonMatched)
+        // Fetch the first page of filtered internships; matched ones carry a match_score
+        const { items, next } = await getStudentInternships(user.student_id, currentFilters())
+        setMatchedInternships(sortMatched(items.filter((i: Internship) => i.match_score !== null)))
+        setNonMatchedInternships(sortNonMatched(items.filter((i: Internship) => i.match_score === null)))
+        setNextPage(next)
       } catch (err) {
         console.error("Error applying filters:", err)
         setError("Failed to apply filters. Please try again.")
@@ -416,6 +434,15 @@ export default function CandidateSearchPage() {
                 </Card>
               )}
             </div>
+
+            {nextPage && (
+              <div className="flex justify-center mt-8">
+                <Button variant="outline" onClick={handleLoadMore} disabled={loadingMore || loading}>
+                  {loadingMore && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                  Load More Internships
+                </Button>
+              </div>
+            )}
           </div>
         </div>
       </div>
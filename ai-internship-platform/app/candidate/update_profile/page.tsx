@@ -138,15 +138,8 @@ export default function CandidateProfilePage() {
         const skills = await getAvailableSkills()
         setAvailableSkills(skills)
         
-        // Parse languages from JSON if it exists
-        let languages = []
-        try {
-          if (profileData.languages_json) {
-            languages = JSON.parse(profileData.languages_json)
-          }
-        } catch (e) {
-          console.error("Error parsing languages:", e)
-        }
+        // languages_json comes back as an array
+        const languages = Array.isArray(profileData.languages_json) ? profileData.languages_json : []
         
         // Parse skills from text if it exists
         let selectedSkills = []
@@ -246,14 +239,11 @@ export default function CandidateProfilePage() {
       // Convert selectedSkills array to comma-separated string
       const skills_text = formData.selectedSkills.join(', ')
       
-      // Convert languages array to JSON string
-      const languages_json = JSON.stringify(formData.languages)
-      
       const profileData = {
         ...formData,
         student_id: user.student_id,
         skills_text,
-        languages_json
+        languages_json: formData.languages
       }
       
       await updateUserProfile(profileData)
@@ -16,6 +16,8 @@ export default function CompanyDashboardPage() {
   const router = useRouter()
   const [companyData, setCompanyData] = useState(null)
   const [internships, setInternships] = useState([])
+  const [nextPage, setNextPage] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [stats, setStats] = useState([
     { label: "Active Internships", value: "0", icon: Building2 },
     { label: "Total Applicants", value: "0", icon: Users },
@@ -45,7 +47,8 @@ export default function CompanyDashboardPage() {
           getCompanyDashboardStats(companyUser.id)
         ])
         
-        setInternships(internshipsData)
+        setInternships(internshipsData.items)
+        setNextPage(internshipsData.next)
         
         // Update stats with real data
         setStats([
@@ -65,6 +68,22 @@ export default function CompanyDashboardPage() {
     fetchDashboardData()
   }, [router])
 
+  // Append the next page of internships (the list is keyset-paginated)
+  const handleLoadMore = async () => {
+    if (!companyData || !nextPage) return
+    try {
+      setLoadingMore(true)
+      const internshipsData = await getCompanyInternships(companyData.id, nextPage)
+      setInternships(prevInternships => [...prevInternships, ...internshipsData.items])
+      setNextPage(internshipsData.next)
+    } catch (err) {
+      console.error(err)
+      toast.error("Failed to load more internships")
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const navItems = [
     { label: "Dashboard", href: "/company/dashboard", active: true },
     { label: "Post Internship", href: "/company/post-internship" },
@@ -125,15 +144,12 @@ export default function CompanyDashboardPage() {
         )
       )
       
-      // Update active internship count in stats
-      const activeCount = internships.filter(i => 
-        i.internship_id !== internshipId ? i.is_active : newStatus
-      ).length
-      
+      // Update active internship count in stats (adjusted in place, since
+      // only the loaded pages of internships are known here)
       setStats(prevStats => 
         prevStats.map(stat => 
           stat.label === "Active Internships" 
-            ? { ...stat, value: activeCount.toString() } 
+            ? { ...stat, value: Math.max(0, parseInt(stat.value, 10) + (newStatus ? 1 : -1)).toString() } 
             : stat
         )
       )
@@ -301,6 +317,14 @@ export default function CompanyDashboardPage() {
                 </TableBody>
               </Table>
             )}
+            {nextPage && (
+              <div className="flex justify-center mt-4">
+                <Button variant="outline" onClick={handleLoadMore} disabled={loadingMore}>
+                  {loadingMore && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                  Load More
+                </Button>
+              </div>
+            )}
           </CardContent>
         </Card>
       </main>
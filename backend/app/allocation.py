@@ -135,10 +135,11 @@ async def run_allocation(
             VALUES ('SUCCESS',
                     json_build_object('respect_existing', :re, 'scoped', 1, 'note','empty scope', 'algorithm', 'hungarian'),
                     NULL)
+            RETURNING run_id
         """),
                 {"re": 1 if respect_existing else 0},
             )
-        ).lastrowid
+        ).scalar_one()
         await db.commit()
         return int(rid)
 
@@ -164,13 +165,14 @@ async def run_allocation(
             VALUES ('SUCCESS',
                     json_build_object('respect_existing', :re, 'scoped', :sc, 'algorithm', 'hungarian'),
                     json_build_object('note','no eligible students in scope'))
+            RETURNING run_id
         """),
                 {
                     "re": 1 if respect_existing else 0,
                     "sc": 1 if bool(scope_emails) else 0,
                 },
             )
-        ).lastrowid
+        ).scalar_one()
         await db.commit()
         return int(rid)
 
@@ -184,13 +186,14 @@ async def run_allocation(
             VALUES ('SUCCESS',
                     json_build_object('respect_existing', :re, 'scoped', :sc, 'algorithm', 'hungarian'),
                     json_build_object('note','no open capacity'))
+            RETURNING run_id
         """),
                 {
                     "re": 1 if respect_existing else 0,
                     "sc": 1 if bool(scope_emails) else 0,
                 },
             )
-        ).lastrowid
+        ).scalar_one()
         await db.commit()
         return int(rid)
 
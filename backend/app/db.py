@@ -1,8 +1,10 @@
 import os
 import asyncio
+import orjson
 from dotenv import load_dotenv
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy import text
 
 # Load environment variables
@@ -11,12 +13,63 @@ load_dotenv()
 # Get database URL from environment, fallback to SQLite for development
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
 SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
+# Read-only handlers can be pointed at a replica; defaults to the primary
+DATABASE_URL_RO = os.getenv("DATABASE_URL_RO", DATABASE_URL)
+
+# Connection pool sizing (per worker process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_RO_POOL_SIZE = int(os.getenv("DB_RO_POOL_SIZE", "20"))
+
+# SQLite keeps SQLAlchemy's default pool; server databases get a sized queue pool
+if DATABASE_URL.startswith("sqlite"):
+    pool_kwargs = {}
+else:
+    pool_kwargs = {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
 
 # Engine
-engine = create_async_engine(DATABASE_URL, echo=SQL_ECHO, pool_pre_ping=True, future=True)
+# The asyncpg dialect installs json_serializer/json_deserializer as json and jsonb
+# type codecs on every new connection, so JSON columns come back as Python objects
+# even from raw text() queries.
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=SQL_ECHO,
+    pool_pre_ping=True,
+    future=True,
+    json_serializer=lambda obj: orjson.dumps(obj).decode(),
+    json_deserializer=orjson.loads,
+    **pool_kwargs
+)
+
+# Read-only engine with its own pool, so GET handlers don't compete with writes
+# for connections. On asyncpg every session is also opened read-only.
+ro_pool_kwargs = dict(pool_kwargs, pool_size=DB_RO_POOL_SIZE) if pool_kwargs else {}
+ro_connect_args = (
+    {"server_settings": {"default_transaction_read_only": "on"}}
+    if DATABASE_URL_RO.startswith("postgresql+asyncpg") else {}
+)
+engine_ro = create_async_engine(
+    DATABASE_URL_RO,
+    echo=SQL_ECHO,
+    pool_pre_ping=True,
+    future=True,
+    json_serializer=lambda obj: orjson.dumps(obj).decode(),
+    json_deserializer=orjson.loads,
+    connect_args=ro_connect_args,
+    **ro_pool_kwargs
+)
 
 # Session
 AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+AsyncSessionLocalRO = sessionmaker(bind=engine_ro, class_=AsyncSession, expire_on_commit=False)
 
 # Base model class
 Base = declarative_base()
@@ -26,6 +79,22 @@ async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
 
+# Dependency for read-only (GET) handlers
+async def get_db_ro():
+    async with AsyncSessionLocalRO() as session:
+        yield session
+
+async def open_pool():
+    """Check out one connection at startup so the first request doesn't pay the connect cost"""
+    for eng in (engine, engine_ro):
+        async with eng.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+async def close_pool():
+    """Close all pooled connections on shutdown"""
+    await engine.dispose()
+    await engine_ro.dispose()
+
 # ✅ Test connection
 if __name__ == "__main__":
     async def test_connection():
@@ -1,4 +1,5 @@
 import json
+import hashlib
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text, bindparam
 from typing import List, Dict, Optional, Tuple, Any
@@ -18,7 +19,7 @@ from .nlp_matching_glove import (
 class EnsembleConfig:
     def __init__(self):
         self.config = {
-            # Ensemble method: 'weighted', 'max_score', 'voting'
+            # Ensemble method: 'weighted', 'max_score', 'voting', 'rank'
             "ensemble_method": "weighted",
             
             # Weights for different allocation methods
@@ -54,6 +55,7 @@ class EnsembleConfig:
                 "min_location_match": 0.0
             }
         }
+        self._etag = None
     
     def get(self, key, default=None):
         """Get a configuration value with dot notation support"""
@@ -75,6 +77,39 @@ class EnsembleConfig:
                 config[k] = {}
             config = config[k]
         config[keys[-1]] = value
+        self._etag = None
+    
+    def update_many(self, updates: Dict[str, Any]):
+        """Apply several dot-notation updates, walking each top-level section once"""
+        grouped = defaultdict(list)
+        for key, value in updates.items():
+            top, _, rest = key.partition('.')
+            grouped[top].append((rest, value))
+        
+        for top, items in grouped.items():
+            section = None
+            for rest, value in items:
+                if not rest:
+                    self.config[top] = value
+                    section = None
+                    continue
+                if section is None:
+                    section = self.config.setdefault(top, {})
+                node = section
+                *parents, leaf = rest.split('.')
+                for k in parents:
+                    node = node.setdefault(k, {})
+                node[leaf] = value
+        self._etag = None
+    
+    def etag(self):
+        """Content hash of the configuration, recomputed only after an update"""
+        if self._etag is None:
+            digest = hashlib.blake2b(
+                json.dumps(self.config, sort_keys=True).encode(), digest_size=16
+            ).hexdigest()
+            self._etag = f'"{digest}"'
+        return self._etag
 
 # Global ensemble configuration
 ensemble_config = EnsembleConfig()
@@ -120,20 +155,23 @@ def traditional_score(
     return score, component_scores
 
 # ---------- Ensemble Scoring ----------
-def ensemble_score(
+# Row order of the per-method score matrices
+ENSEMBLE_METHODS = ("traditional", "glove")
+# Component order along axis 1 of the component matrix
+SCORE_COMPONENTS = ("skill_score", "location_score", "cgpa_score")
+
+def method_scores(
     student_skills: str,
     required_skills: str,
     student_location: str,
     job_location: str,
     student_cgpa: float,
     job_min_cgpa: float
-) -> Tuple[float, Dict[str, Any]]:
+) -> Tuple[Tuple[float, Dict[str, Any]], Tuple[float, Dict[str, Any]]]:
     """
-    Calculate ensemble score using both traditional and GloVe methods
+    Score a student-job pair with the traditional and GloVe methods.
+    Returns ((trad_score, trad_components), (glove_score, glove_components))
     """
-    # Get configuration
-    ensemble_method = ensemble_config.get("ensemble_method", "weighted")
-    method_weights = ensemble_config.get("method_weights", {"traditional": 0.4, "glove": 0.6})
     use_comprehensive = ensemble_config.get("use_comprehensive_glove", True)
     traditional_weights = ensemble_config.get("traditional_weights", {})
     glove_weights = ensemble_config.get("glove_weights", {})
@@ -181,85 +219,100 @@ def ensemble_score(
             }
         }
     
-    # Calculate ensemble score based on method
+    return (trad_score, trad_components), (glove_score, glove_components)
+
+def component_matrix(
+    trad_components: List[Dict[str, Any]],
+    glove_components: List[Dict[str, Any]]
+) -> np.ndarray:
+    """Stack per-pair component scores into an array of shape [methods, components, pairs]"""
+    return np.array([
+        [[c[name] for c in per_method] for name in SCORE_COMPONENTS]
+        for per_method in (trad_components, glove_components)
+    ], dtype=np.float64)
+
+def combine_method_scores(scores: np.ndarray, components: np.ndarray) -> np.ndarray:
+    """
+    Combine per-method scores (shape [methods, pairs]) into one ensemble score
+    per pair, for all pairs at once.
+    """
+    ensemble_method = ensemble_config.get("ensemble_method", "weighted")
+    
+    if ensemble_method == "max_score":
+        return scores.max(axis=0)
+    
+    if ensemble_method == "voting":
+        # Each component "votes" for the best method, i.e. takes the higher score,
+        # weighted with the traditional weights for simplicity (could be configurable)
+        traditional_weights = ensemble_config.get("traditional_weights", {})
+        component_weights = np.array([
+            traditional_weights.get("skill_weight", 0.65),
+            traditional_weights.get("location_weight", 0.20),
+            traditional_weights.get("cgpa_weight", 0.15)
+        ])
+        return component_weights @ components.max(axis=0)
+    
+    method_weights = ensemble_config.get("method_weights", {"traditional": 0.4, "glove": 0.6})
+    weights = np.array([
+        method_weights.get("traditional", 0.4),
+        method_weights.get("glove", 0.6)
+    ])
+    
+    if ensemble_method == "rank":
+        # Weighted harmonic mean of per-method ranks (1 = worst), scaled to (0, 1]
+        ranks = scores.argsort(axis=1).argsort(axis=1) + 1.0
+        return 1.0 / (weights @ (1.0 / ranks)) / scores.shape[1]
+    
+    # weighted
+    return weights @ scores
+
+def ensemble_details(
+    trad_score: float,
+    trad_components: Dict[str, Any],
+    glove_score: float,
+    glove_components: Dict[str, Any],
+    final_score: float
+) -> Dict[str, Any]:
+    """Create detailed results for analysis"""
+    ensemble_method = ensemble_config.get("ensemble_method", "weighted")
     if ensemble_method == "max_score":
-        final_score = max(trad_score, glove_score)
         selected_method = "traditional" if trad_score >= glove_score else "glove"
-        
     elif ensemble_method == "voting":
-        # Each component "votes" for the best method
-        skill_winner = "traditional" if trad_components["skill_score"] >= glove_components["skill_score"] else "glove"
-        location_winner = "traditional" if trad_components["location_score"] >= glove_components["location_score"] else "glove"
-        cgpa_winner = "traditional" if trad_components["cgpa_score"] >= glove_components["cgpa_score"] else "glove"
-        
-        # Calculate component scores using the winning method for each
-        skill_score = trad_components["skill_score"] if skill_winner == "traditional" else glove_components["skill_score"]
-        location_score = trad_components["location_score"] if location_winner == "traditional" else glove_components["location_score"]
-        cgpa_score = trad_components["cgpa_score"] if cgpa_winner == "traditional" else glove_components["cgpa_score"]
-        
-        # Use the traditional weights for simplicity (could be configurable)
-        skill_weight = traditional_weights.get("skill_weight", 0.65)
-        location_weight = traditional_weights.get("location_weight", 0.20)
-        cgpa_weight = traditional_weights.get("cgpa_weight", 0.15)
-        
-        final_score = skill_weight * skill_score + location_weight * location_score + cgpa_weight * cgpa_score
         selected_method = "hybrid"
-        
-    else:  # weighted
-        trad_weight = method_weights.get("traditional", 0.4)
-        glove_weight = method_weights.get("glove", 0.6)
-        final_score = trad_weight * trad_score + glove_weight * glove_score
-        selected_method = "weighted"
+    else:
+        selected_method = ensemble_method
     
-    # Create detailed results for analysis
-    ensemble_results = {
+    return {
         "traditional_score": round(trad_score, 4),
         "glove_score": round(glove_score, 4),
         "traditional_components": trad_components,
         "glove_components": glove_components,
         "ensemble_method": ensemble_method,
         "selected_method": selected_method,
-        "method_weights": method_weights,
+        "method_weights": ensemble_config.get("method_weights", {"traditional": 0.4, "glove": 0.6}),
         "final_score": round(final_score, 4)
     }
-    
-    return final_score, ensemble_results
 
 # ---------- Validation Function ----------
-def validate_match(
-    student_skills: str,
-    required_skills: str,
-    student_location: str,
-    job_location: str, 
-    score: float,
-    components: Dict[str, Any]
-) -> bool:
+def validation_mask(components: np.ndarray) -> np.ndarray:
     """
-    Validates a match against minimum thresholds to ensure quality
+    Validates matches against minimum thresholds to ensure quality.
+    Takes the component matrix [methods, components, pairs]; returns a
+    boolean mask over pairs (all True when validation is disabled).
     """
     validation_config = ensemble_config.get("validation", {})
     if not validation_config.get("enabled", True):
-        return True
+        return np.ones(components.shape[2], dtype=bool)
     
     min_skill_match = validation_config.get("min_skill_match", 0.15)
     min_location_match = validation_config.get("min_location_match", 0.0)
     
-    # Check if using GloVe components or traditional components
-    if "glove_components" in components:
-        skill_score = components["glove_components"]["skill_score"]
-        location_score = components["glove_components"]["location_score"]
-    else:
-        skill_score = components["skill_score"]
-        location_score = components["location_score"]
-    
-    # Apply validation rules
-    if skill_score < min_skill_match:
-        return False
+    # Validation looks at the GloVe components
+    glove = components[ENSEMBLE_METHODS.index("glove")]
+    skill_score = glove[SCORE_COMPONENTS.index("skill_score")]
+    location_score = glove[SCORE_COMPONENTS.index("location_score")]
     
-    if location_score < min_location_match:
-        return False
-    
-    return True
+    return (skill_score >= min_skill_match) & (location_score >= min_location_match)
 
 # ---------- Core Ensemble Allocation ----------
 async def run_ensemble_allocation(
@@ -275,22 +328,22 @@ async def run_ensemble_allocation(
     Run allocation using ensemble of traditional and GloVe methods.
     Returns: run_id
     """
-    # Update weights if provided
-    if skill_weight is not None:
-        ensemble_config.update("traditional_weights.skill_weight", skill_weight)
-        ensemble_config.update("glove_weights.skill_weight", skill_weight)
-    
-    if location_weight is not None:
-        ensemble_config.update("traditional_weights.location_weight", location_weight)
-        ensemble_config.update("glove_weights.location_weight", location_weight)
-    
-    if cgpa_weight is not None:
-        ensemble_config.update("traditional_weights.cgpa_weight", cgpa_weight)
-        ensemble_config.update("glove_weights.cgpa_weight", cgpa_weight)
+    # Update weights and ensemble method if provided
+    updates = {}
+    for name, value in (
+        ("skill_weight", skill_weight),
+        ("location_weight", location_weight),
+        ("cgpa_weight", cgpa_weight),
+    ):
+        if value is not None:
+            updates[f"traditional_weights.{name}"] = value
+            updates[f"glove_weights.{name}"] = value
     
-    # Update ensemble method if provided
     if ensemble_method is not None:
-        ensemble_config.update("ensemble_method", ensemble_method)
+        updates["ensemble_method"] = ensemble_method
+    
+    if updates:
+        ensemble_config.update_many(updates)
 
     # 1. Latest successful run
     latest_run_id = (await db.execute(text("""
@@ -361,7 +414,8 @@ async def run_ensemble_allocation(
             VALUES ('SUCCESS',
                     json_build_object('respect_existing', :re, 'scoped', 1, 'note','empty scope', 'method', 'ensemble'),
                     NULL)
-        """), {"re": 1 if respect_existing else 0})).lastrowid
+            RETURNING run_id
+        """), {"re": 1 if respect_existing else 0})).scalar_one()
         await db.commit()
         return int(rid)
 
@@ -385,7 +439,8 @@ async def run_ensemble_allocation(
             VALUES ('SUCCESS',
                     json_build_object('respect_existing', :re, 'scoped', :sc, 'method', 'ensemble'),
                     json_build_object('note','no eligible students in scope'))
-        """), {"re": 1 if respect_existing else 0, "sc": 1 if bool(scope_emails) else 0})).lastrowid
+            RETURNING run_id
+        """), {"re": 1 if respect_existing else 0, "sc": 1 if bool(scope_emails) else 0})).scalar_one()
         await db.commit()
         return int(rid)
 
@@ -397,12 +452,13 @@ async def run_ensemble_allocation(
             VALUES ('SUCCESS',
                     json_build_object('respect_existing', :re, 'scoped', :sc, 'method', 'ensemble'),
                     json_build_object('note','no open capacity'))
-        """), {"re": 1 if respect_existing else 0, "sc": 1 if bool(scope_emails) else 0})).lastrowid
+            RETURNING run_id
+        """), {"re": 1 if respect_existing else 0, "sc": 1 if bool(scope_emails) else 0})).scalar_one()
         await db.commit()
         return int(rid)
 
-    # 7. Score student-job pairs with ensemble method
-    pairs = []
+    # 7. Score student-job pairs with each method
+    candidates = []
     for s in students:
         for jid in open_jobs:
             j = job_info[jid]
@@ -414,8 +470,7 @@ async def run_ensemble_allocation(
             if not cg_ok:
                 continue
             
-            # Calculate ensemble score
-            score, components = ensemble_score(
+            (trad_score, trad_components), (glove_score, glove_components) = method_scores(
                 s["skills_text"] or "", 
                 j["req_skills_text"],
                 s["location_pref"] or "", 
@@ -423,23 +478,30 @@ async def run_ensemble_allocation(
                 float(s["cgpa"] or 0.0), 
                 j["min_cgpa"]
             )
-            
-            # Apply minimum score threshold
-            min_threshold = ensemble_config.get("min_score_threshold", 0.2)
-            if score < min_threshold:
-                continue
-            
-            # Validate match against quality criteria
-            if not validate_match(
-                s["skills_text"] or "", 
-                j["req_skills_text"],
-                s["location_pref"] or "", 
-                j["location"] or "",
-                score, components
-            ):
-                continue
-            
-            pairs.append((score, int(s["student_id"]), int(jid), components))
+            candidates.append((
+                int(s["student_id"]), int(jid),
+                trad_score, trad_components, glove_score, glove_components
+            ))
+
+    # Combine the method scores for all pairs at once, then apply the minimum
+    # score threshold and the validation rules as masks
+    pairs = []
+    if candidates:
+        scores = np.array([
+            [c[2] for c in candidates],
+            [c[4] for c in candidates]
+        ], dtype=np.float64)
+        components = component_matrix(
+            [c[3] for c in candidates], [c[5] for c in candidates]
+        )
+        final_scores = combine_method_scores(scores, components)
+        
+        keep = final_scores >= ensemble_config.get("min_score_threshold", 0.2)
+        keep &= validation_mask(components)
+        
+        for idx in np.flatnonzero(keep):
+            sid, jid = candidates[idx][0], candidates[idx][1]
+            pairs.append((float(final_scores[idx]), sid, jid, int(idx)))
 
     pairs.sort(reverse=True, key=lambda x: x[0])
 
@@ -447,12 +509,12 @@ async def run_ensemble_allocation(
     assigned = {}
     remaining = {jid: job_info[jid]["remaining"] for jid in open_jobs}
 
-    for score, sid, jid, comp in pairs:
+    for score, sid, jid, idx in pairs:
         if sid in assigned:
             continue
         if remaining.get(jid, 0) <= 0:
             continue
-        assigned[sid] = (jid, score, comp)
+        assigned[sid] = (jid, score, ensemble_details(*candidates[idx][2:], score))
         remaining[jid] -= 1
 
     # 9. Record run + matches
@@ -0,0 +1,73 @@
+# app/logging_config.py
+import copy
+import logging
+import os
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue
+
+import orjson
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+# One JSON object per line instead of LOG_FORMAT (see log_config.json for uvicorn)
+LOG_JSON = os.getenv("LOG_JSON", "false").lower() == "true"
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Render records as single-line JSON. Fields passed via extra={...}
+    (e.g. student_id) are emitted as top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS
+        )
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+class _QueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves the traceback in exc_text instead of folding it
+    into the message, so the listener's formatter decides where it goes.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging() -> QueueListener:
+    """
+    Route the app's loggers through a QueueHandler so request handlers only
+    enqueue records; a background QueueListener thread does the stderr write.
+    Returns the listener, which the caller must start and stop.
+    """
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JSONFormatter() if LOG_JSON else logging.Formatter(LOG_FORMAT))
+
+    log_queue = Queue(-1)
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(LOG_LEVEL)
+    app_logger.handlers[:] = [_QueueHandler(log_queue)]
+    app_logger.propagate = False
+
+    return QueueListener(log_queue, stream_handler, respect_handler_level=True)
@@ -1,5 +1,9 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.db import open_pool, close_pool
+from app.logging_config import setup_logging
 from app.routers.health import router as health_router
 from app.routers.students import router as students_router
 from app.routers.runs import router as runs_router
@@ -9,14 +13,29 @@ from app.routers.auth import router as auth_router
 from app.routers.dashboard import router as dashboard_router
 from app.routers.search import router as search_router  
 from app.routers.preferences import router as preferences_router
-from app.routers.internship_details import router as internship_details_router
+from app.routers.internship_details import router as internship_details_router, details_batcher
 from app.routers.dashboard_company import router as dashboard_company_router
 from app.routers.allocation_router import router as allocation_router
-from app.routers.logs import router as logs_router
+from app.routers.logs import router as logs_router, refresh_log_counts_periodically
 from app.routers.ensemble_allocation_router import router as ensemble_allocation_router
 from app.routers.nlp_router import router as nlp_router
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_listener = setup_logging()
+    log_listener.start()
+    await open_pool()
+    log_counts_task = asyncio.create_task(refresh_log_counts_periodically())
+    yield
+    log_counts_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await log_counts_task
+    await details_batcher.close()
+    await close_pool()
+    log_listener.stop()
+
 # Register routers (add this line)
-app = FastAPI(title="PM Internship Allocation API", version="1.0")
+app = FastAPI(title="PM Internship Allocation API", version="1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
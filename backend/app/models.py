@@ -3,8 +3,10 @@ from __future__ import annotations
 from typing import Optional, List, Dict
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import (
-    String, Integer, BigInteger, Text, ForeignKey, DECIMAL, JSON, DateTime, Enum, UniqueConstraint, Boolean
+    String, Integer, BigInteger, Text, ForeignKey, DECIMAL, JSON, DateTime, Enum, UniqueConstraint, Boolean,
+    Index, text, event, DDL
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from .db import Base
 
 # -----------------------------
@@ -33,6 +35,10 @@ class DisabilityType(Base):
 
 class Organization(Base):
     __tablename__ = "organization"
+    __table_args__ = (
+        UniqueConstraint("org_email", name="ux_org_email"),
+        UniqueConstraint("org_name", name="ux_org_name"),
+    )
 
     org_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     org_name: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -80,6 +86,10 @@ PhoneEnum = Enum(
 
 class Student(Base):
     __tablename__ = "student"
+    __table_args__ = (
+        # Login looks students up by email alone; no (email, password) composite
+        Index("idx_student_email", "email", unique=True),
+    )
 
     student_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     ext_id: Mapped[Optional[str]] = mapped_column(String(64))
@@ -104,7 +114,7 @@ class Student(Base):
     category_code: Mapped[str] = mapped_column(String(16), ForeignKey("category.category_code"), nullable=False)
     disability_code: Mapped[str] = mapped_column(String(16), ForeignKey("disability_type.code"), nullable=False)
 
-    languages_json: Mapped[Optional[Dict]] = mapped_column(JSON)
+    languages_json: Mapped[Optional[Dict]] = mapped_column(JSONB)
     skills_text: Mapped[Optional[str]] = mapped_column(Text)
     resume_url: Mapped[Optional[str]] = mapped_column(String(500))
     resume_summary: Mapped[Optional[str]] = mapped_column(Text)
@@ -156,6 +166,27 @@ class StudentAvailability(Base):
 
 class Internship(Base):
     __tablename__ = "internship"
+    __table_args__ = (
+        # Allocation only ever reads the active internships
+        Index(
+            "idx_internship_active",
+            "internship_id",
+            postgresql_where=text("is_active = true"),
+        ),
+        # Trigram indexes for the search filters' case-insensitive
+        # lower(col) LIKE lower('%term%') predicates
+        *(
+            Index(
+                f"idx_internship_{col}_trgm_lower",
+                text(f"lower({col}) gin_trgm_ops"),
+                postgresql_using="gin",
+            )
+            for col in ("title", "org_name", "description", "location", "req_skills_text")
+        ),
+        # Prefix (autocomplete) filters, lower(col) LIKE 'term%', under a non-C collation
+        Index("idx_internship_org_prefix", text("lower(org_name) text_pattern_ops")),
+        Index("idx_internship_location_prefix", text("lower(location) text_pattern_ops")),
+    )
 
     internship_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
 
@@ -217,6 +248,7 @@ class Preference(Base):
     __tablename__ = "preference"
     __table_args__ = (
         UniqueConstraint("student_id", "internship_id", name="ux_pref_unique"),
+        Index("idx_preference_student_rank", "student_id", "ranked"),
     )
 
     preference_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
@@ -229,6 +261,30 @@ class Preference(Base):
     internship: Mapped["Internship"] = relationship(back_populates="preferences")
 
 
+class ShortlistedCandidate(Base):
+    __tablename__ = "shortlisted_candidates"
+    __table_args__ = (
+        # Target of the shortlist endpoint's ON CONFLICT (internship_id, student_id)
+        UniqueConstraint("internship_id", "student_id", name="ux_shortlist_internship_student"),
+        # Student profile aggregates shortlists by student
+        Index("idx_shortlist_student", "student_id"),
+    )
+
+    shortlist_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    # FK names are matched by the shortlist endpoint to report a missing internship/student
+    internship_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("internship.internship_id", name="shortlisted_candidates_internship_id_fkey"),
+        nullable=False,
+    )
+    student_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("student.student_id", name="shortlisted_candidates_student_id_fkey"),
+        nullable=False,
+    )
+    created_at: Mapped["DateTime"] = mapped_column(DateTime, nullable=False, server_default=text("now()"))
+
+
 # -----------------------------
 # Allocation Runs / Matches / Audit
 # -----------------------------
@@ -245,6 +301,15 @@ AuditLevelEnum = Enum(
 
 class AllocRun(Base):
     __tablename__ = "alloc_run"
+    __table_args__ = (
+        # Latest successful run: ORDER BY created_at DESC LIMIT 1 over SUCCESS rows only
+        Index(
+            "idx_alloc_run_success_created_desc",
+            text("created_at DESC"),
+            postgresql_where=text("status = 'SUCCESS'"),
+            postgresql_include=["run_id"],
+        ),
+    )
 
     run_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     status: Mapped[str] = mapped_column(RunStatusEnum, nullable=False, default="SUCCESS")
@@ -260,7 +325,22 @@ class AllocRun(Base):
 class MatchResult(Base):
     __tablename__ = "match_result"
     __table_args__ = (
+        # Also serves run_id lookups and the alloc_run join (leading column)
         UniqueConstraint("run_id", "student_id", name="ux_run_student"),
+        # Top matches per student: index range scan, no sort; internship_id is
+        # a key column so (final_score, internship_id) ties come out in order
+        Index(
+            "idx_match_student_score",
+            "student_id", text("final_score DESC"), text("internship_id DESC"),
+        ),
+        # Anti-join probe for "not matched to this student": one lookup per internship
+        Index("idx_match_result_student_intern", "student_id", "internship_id"),
+        # Candidates per internship, best first
+        Index(
+            "ix_mr_internship_score_desc",
+            "internship_id", text("final_score DESC"),
+            postgresql_include=["student_id"],
+        ),
     )
 
     match_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
@@ -281,6 +361,19 @@ class MatchResult(Base):
 
 class AuditLog(Base):
     __tablename__ = "audit_log"
+    __table_args__ = (
+        # Trigram index: lets message ILIKE '%term%' use an index instead of a seq scan
+        Index(
+            "audit_log_message_trgm_idx", "message",
+            postgresql_using="gin",
+            postgresql_ops={"message": "gin_trgm_ops"},
+        ),
+        # Newest-first listing: ORDER BY created_at DESC, audit_id DESC reads in index order
+        Index(
+            "audit_log_created_at_audit_id_desc_idx",
+            text("created_at DESC"), text("audit_id DESC"),
+        ),
+    )
 
     audit_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     run_id: Mapped[Optional[int]] = mapped_column(BigInteger, ForeignKey("alloc_run.run_id"))
@@ -289,4 +382,56 @@ class AuditLog(Base):
     payload_json: Mapped[Optional[Dict]] = mapped_column(JSON)
     created_at: Mapped["DateTime"] = mapped_column(DateTime, nullable=False)
 
-    run: Mapped[Optional["AllocRun"]] = relationship(back_populates="audits")
\ No newline at end of file
+    run: Mapped[Optional["AllocRun"]] = relationship(back_populates="audits")
+
+# gin_trgm_ops comes from the pg_trgm extension (internship and audit_log indexes)
+event.listen(
+    Base.metadata, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+# Per-day, per-level audit_log row counts for /admin/logs/summary;
+# refreshed periodically by the app (see app.routers.logs)
+event.listen(
+    Base.metadata, "after_create",
+    DDL("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS audit_log_daily_counts AS
+        SELECT created_at::date AS day, level, count(*) AS cnt
+        FROM audit_log
+        GROUP BY 1, 2
+    """).execute_if(dialect="postgresql"),
+)
+# REFRESH ... CONCURRENTLY needs a unique index
+event.listen(
+    Base.metadata, "after_create",
+    DDL("""
+        CREATE UNIQUE INDEX IF NOT EXISTS audit_log_daily_counts_day_level_idx
+        ON audit_log_daily_counts (day, level)
+    """).execute_if(dialect="postgresql"),
+)
+
+# Distinct search filter values (locations, companies, skills) for /search/filters;
+# refreshed by the app after internship inserts
+event.listen(
+    Base.metadata, "after_create",
+    DDL("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS internship_filter_options AS
+        SELECT 'location' AS kind, location AS value
+        FROM internship WHERE location IS NOT NULL AND location <> ''
+        UNION
+        SELECT 'company', org_name
+        FROM internship WHERE org_name IS NOT NULL AND org_name <> ''
+        UNION
+        SELECT 'skill', btrim(s, E' \\t\\r\\n')
+        FROM internship, regexp_split_to_table(req_skills_text, ',') AS s
+        WHERE req_skills_text IS NOT NULL AND btrim(s, E' \\t\\r\\n') <> ''
+    """).execute_if(dialect="postgresql"),
+)
+# REFRESH ... CONCURRENTLY needs a unique index
+event.listen(
+    Base.metadata, "after_create",
+    DDL("""
+        CREATE UNIQUE INDEX IF NOT EXISTS internship_filter_options_kind_value_idx
+        ON internship_filter_options (kind, value)
+    """).execute_if(dialect="postgresql"),
+)
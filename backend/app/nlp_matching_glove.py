@@ -2,6 +2,7 @@ import numpy as np
 from typing import Dict, List, Optional
 import os
 import json
+import threading
 
 # Global cache for GloVe model to avoid reloading
 _glove_model_cache = None
@@ -113,6 +114,7 @@ _config = GloVeMatchingConfig()
 def load_glove_model(glove_file_path: str) -> Dict[str, np.ndarray]:
     """
     Loads a GloVe word embedding model from file.
+    Vectors are kept as float32, which is the precision GloVe is published in.
     """
     print(f"Loading GloVe model from {glove_file_path}...")
     
@@ -125,12 +127,50 @@ def load_glove_model(glove_file_path: str) -> Dict[str, np.ndarray]:
         for line in f:
             values = line.split()
             word = values[0]
-            vector = np.array([float(x) for x in values[1:]])
+            vector = np.asarray(values[1:], dtype=np.float32)
             model[word] = vector
     
     print(f"Successfully loaded {len(model)} word vectors from GloVe file")
     return model
 
+def _tokenize(text: str) -> List[str]:
+    """Tokenization logic similar to the Jaccard function"""
+    return [w.strip().lower() for w in text.replace(",", " ").split() if w.strip()]
+
+def _resolve_token(token: str, model: Dict[str, np.ndarray]) -> Optional[np.ndarray]:
+    """
+    Finds the word vector for a token, or None if nothing matches:
+    1. Direct word match
+    2. Substring matching for compound words
+    3. Character-level similarity for typos
+    """
+    # Strategy 1: Direct match
+    if token in model:
+        return model[token]
+    
+    # Strategy 2: Substring matching for compound words
+    # e.g., "machinelearning" -> "machine" + "learning"
+    for word in model.keys():
+        if word in token or token in word:
+            return model[word]
+    
+    # Strategy 3: Character-level similarity (simple implementation)
+    best_match = None
+    best_similarity = 0.0
+    
+    for word in model.keys():
+        # Simple character overlap similarity
+        overlap = len(set(token) & set(word))
+        union = len(set(token) | set(word))
+        if union > 0:
+            similarity = overlap / union
+            threshold = _config.get("character_similarity_threshold", 0.3)
+            if similarity > best_similarity and similarity > threshold:
+                best_similarity = similarity
+                best_match = word
+    
+    return model[best_match] if best_match else None
+
 # 2. Document Vectorization with Fallback Strategy
 def get_document_vector(text: str, model: Dict[str, np.ndarray]) -> np.ndarray:
     """
@@ -143,46 +183,12 @@ def get_document_vector(text: str, model: Dict[str, np.ndarray]) -> np.ndarray:
     if not text:
         return np.zeros(list(model.values())[0].shape) if model else np.array([0.0])
     
-    # Tokenization logic similar to the Jaccard function:
-    tokens = [w.strip().lower() for w in text.replace(",", " ").split() if w.strip()]
-    
+    _sync_caches(model)
     valid_vectors = []
-    
-    for token in tokens:
-        # Strategy 1: Direct match
-        if token in model:
-            valid_vectors.append(model[token])
-            continue
-            
-        # Strategy 2: Substring matching for compound words
-        # e.g., "machinelearning" -> "machine" + "learning"
-        found_match = False
-        for word in model.keys():
-            if word in token or token in word:
-                valid_vectors.append(model[word])
-                found_match = True
-                break
-        
-        if found_match:
-            continue
-            
-        # Strategy 3: Character-level similarity (simple implementation)
-        best_match = None
-        best_similarity = 0.0
-        
-        for word in model.keys():
-            # Simple character overlap similarity
-            overlap = len(set(token) & set(word))
-            union = len(set(token) | set(word))
-            if union > 0:
-                similarity = overlap / union
-                threshold = _config.get("character_similarity_threshold", 0.3)
-                if similarity > best_similarity and similarity > threshold:
-                    best_similarity = similarity
-                    best_match = word
-        
-        if best_match:
-            valid_vectors.append(model[best_match])
+    for token in _tokenize(text):
+        vector = _resolve_token_cached(token, model)
+        if vector is not None:
+            valid_vectors.append(vector)
     
     if not valid_vectors:
         # Return a zero vector of the correct dimension if no words are found
@@ -234,32 +240,14 @@ def glove_skill_match_score(student_skills: str, required_skills: str, glove_mod
     # Since word vectors are generally orthogonal, the score is usually positive or close to zero.
     return max(0.0, score)
 
-# 5. Enhanced Location Matching with GloVe
-def glove_location_match_score(student_location: str, job_location: str, glove_model: Dict[str, np.ndarray]) -> float:
-    """
-    Enhanced location matching using GloVe embeddings.
-    Handles city names, regions, states, and geographic relationships.
-    """
-    if not student_location or not job_location:
-        return 0.0
-    
-    # Direct exact match (highest priority)
-    if student_location.lower().strip() == job_location.lower().strip():
-        return 1.0
-    
-    # Use GloVe for semantic location matching
-    location_score = glove_skill_match_score(student_location, job_location, glove_model)
-    
-    # Boost score for geographic relationships
+def _geographic_boost(student_loc_lower: str, job_loc_lower: str) -> float:
+    """Boost for known geographic relationships between two lowercased locations"""
     # Common geographic relationships that should have higher scores
     geographic_boost = 0.0
     
     # City-state relationships (e.g., "Mumbai" vs "Maharashtra")
     city_state_pairs = _config.get("city_state_pairs", [])
     
-    student_loc_lower = student_location.lower().strip()
-    job_loc_lower = job_location.lower().strip()
-    
     city_state_boost = _config.get("city_state_boost", 0.3)
     for city, state in city_state_pairs:
         if (city in student_loc_lower and state in job_loc_lower) or \
@@ -282,6 +270,27 @@ def glove_location_match_score(student_location: str, job_location: str, glove_m
                     regional_boost = _config.get("regional_boost", 0.2)
                     geographic_boost = max(geographic_boost, regional_boost)
     
+    return geographic_boost
+
+# 5. Enhanced Location Matching with GloVe
+def glove_location_match_score(student_location: str, job_location: str, glove_model: Dict[str, np.ndarray]) -> float:
+    """
+    Enhanced location matching using GloVe embeddings.
+    Handles city names, regions, states, and geographic relationships.
+    """
+    if not student_location or not job_location:
+        return 0.0
+    
+    # Direct exact match (highest priority)
+    if student_location.lower().strip() == job_location.lower().strip():
+        return 1.0
+    
+    # Use GloVe for semantic location matching
+    location_score = glove_skill_match_score(student_location, job_location, glove_model)
+    
+    # Boost score for geographic relationships
+    geographic_boost = _geographic_boost(student_location.lower().strip(), job_location.lower().strip())
+    
     return min(1.0, location_score + geographic_boost)
 
 # 6. Enhanced CGPA Matching with Context
@@ -496,6 +505,191 @@ def jaccard_fallback(text_a: str, text_b: str) -> float:
         return 0.0
     return len(A & B) / len(A | B)
 
+# 9. Batch Matching (all student-job pairs at once)
+def _unique_inverse(values: List) -> tuple[List, np.ndarray]:
+    """Distinct values in first-seen order, plus the index of each input in that list"""
+    positions = {}
+    inverse = np.fromiter(
+        (positions.setdefault(v, len(positions)) for v in values),
+        dtype=np.intp, count=len(values)
+    )
+    return list(positions), inverse
+
+# Document vectors by text and resolved word vectors by token, kept across
+# allocation runs; both are reset when the model changes.
+# Scoring runs in worker threads, so every read/write of the caches holds
+# _cache_lock (reentrant: embedding resolves tokens through the token cache)
+_EMBED_CACHE_MAX = 100_000
+_embed_cache: Dict[str, np.ndarray] = {}
+_token_cache: Dict[str, Optional[np.ndarray]] = {}
+_embed_cache_model_id: Optional[int] = None
+_cache_lock = threading.RLock()
+
+def _sync_caches(model: Dict[str, np.ndarray]):
+    """Drop cached vectors that were computed with a different model"""
+    global _embed_cache_model_id
+    with _cache_lock:
+        if _embed_cache_model_id != id(model):
+            _embed_cache.clear()
+            _token_cache.clear()
+            _embed_cache_model_id = id(model)
+
+def _resolve_token_cached(token: str, model: Dict[str, np.ndarray]) -> Optional[np.ndarray]:
+    """
+    _resolve_token with memoization: a token missing from the vocabulary costs a
+    Python scan over every model word, so each one is only resolved once
+    """
+    with _cache_lock:
+        if token in _token_cache:
+            return _token_cache[token]
+        if len(_token_cache) >= _EMBED_CACHE_MAX:
+            _token_cache.clear()
+        vector = _token_cache[token] = _resolve_token(token, model)
+        return vector
+
+def embed_texts(texts: List[str], model: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Document vectors for many texts at once, shape (len(texts), D).
+    Same result as get_document_vector per text; texts embedded by an earlier
+    call with the same model are served from the cache.
+    """
+    if not texts:
+        dim = len(next(iter(model.values()))) if model else 3
+        return np.zeros((0, dim), dtype=np.float32)
+    
+    # Held until the result is stacked, so another thread can't clear the
+    # cache between filling it and reading it back
+    with _cache_lock:
+        _sync_caches(model)
+        missing = list(dict.fromkeys(t for t in texts if t not in _embed_cache))
+        if missing:
+            if len(_embed_cache) + len(missing) > _EMBED_CACHE_MAX:
+                _embed_cache.clear()
+                missing = list(dict.fromkeys(texts))
+            for text, vector in zip(missing, _embed_uncached(missing, model)):
+                _embed_cache[text] = vector
+        return np.stack([_embed_cache[t] for t in texts])
+
+def _embed_uncached(texts: List[str], model: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Every distinct token is resolved only once and the per-text means are
+    taken with np.add.reduceat.
+    """
+    dim = len(next(iter(model.values()))) if model else 3
+    token_rows: Dict[str, int] = {}
+    vocab: List[np.ndarray] = []
+    indices: List[int] = []
+    offsets = np.zeros(len(texts), dtype=np.intp)
+    counts = np.zeros(len(texts), dtype=np.intp)
+    
+    for i, text in enumerate(texts):
+        offsets[i] = len(indices)
+        for token in _tokenize(text or ""):
+            row = token_rows.get(token)
+            if row is None:
+                vector = _resolve_token_cached(token, model)
+                row = -1 if vector is None else len(vocab)
+                if vector is not None:
+                    vocab.append(vector)
+                token_rows[token] = row
+            if row >= 0:
+                indices.append(row)
+                counts[i] += 1
+    
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    if indices:
+        has_tokens = counts > 0
+        sums = np.add.reduceat(np.asarray(vocab)[indices], offsets[has_tokens], axis=0)
+        vectors[has_tokens] = sums / counts[has_tokens, None]
+    return vectors
+
+def cosine_similarity_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity of every row of a with every row of b; zero rows score 0.
+    Computed in float32 (single-precision GEMM, half the bytes of float64).
+    """
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    a_norm = np.linalg.norm(a, axis=1, keepdims=True)
+    b_norm = np.linalg.norm(b, axis=1, keepdims=True)
+    a = np.divide(a, a_norm, out=np.zeros_like(a), where=a_norm > 0)
+    b = np.divide(b, b_norm, out=np.zeros_like(b), where=b_norm > 0)
+    return a @ b.T
+
+def glove_comprehensive_score_matrix(
+    student_skills: List[str],
+    required_skills: List[str],
+    student_locations: List[str],
+    job_locations: List[str],
+    student_cgpas: List[float],
+    job_min_cgpas: List[float],
+    skill_weight: Optional[float] = None,
+    location_weight: Optional[float] = None,
+    cgpa_weight: Optional[float] = None,
+    glove_file_path: Optional[str] = None
+) -> tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Matrix form of glove_comprehensive_similarity for S students x J jobs.
+    Each distinct text is embedded once and similarities come from one
+    matrix product per component. Returns (total_scores, component_scores),
+    all of shape (S, J).
+    """
+    default_weights = _config.get("default_weights", {})
+    skill_weight = skill_weight if skill_weight is not None else default_weights.get("skill_weight", 0.65)
+    location_weight = location_weight if location_weight is not None else default_weights.get("location_weight", 0.20)
+    cgpa_weight = cgpa_weight if cgpa_weight is not None else default_weights.get("cgpa_weight", 0.15)
+    
+    try:
+        glove_path = glove_file_path or _config.get("glove_file_path", "glove.6B.200d.txt")
+        model = get_cached_glove_model(glove_path)
+    except Exception as e:
+        print(f"Warning: GloVe comprehensive matching failed ({e}), falling back to traditional scoring")
+        model = None
+    
+    # Skills: cosine similarity of the document vectors, floored at 0
+    s_skills, s_skill_idx = _unique_inverse([t or "" for t in student_skills])
+    j_skills, j_skill_idx = _unique_inverse([t or "" for t in required_skills])
+    if model is not None:
+        skill = np.maximum(cosine_similarity_matrix(
+            embed_texts(s_skills, model), embed_texts(j_skills, model)
+        ), 0.0)
+    else:
+        skill = np.array([[jaccard_fallback(a, b) for b in j_skills] for a in s_skills])
+    skill = skill.reshape(len(s_skills), len(j_skills))[np.ix_(s_skill_idx, j_skill_idx)]
+    
+    # Locations: exact match wins, otherwise GloVe similarity plus geographic boost
+    s_locs, s_loc_idx = _unique_inverse([(t or "").lower().strip() for t in student_locations])
+    j_locs, j_loc_idx = _unique_inverse([(t or "").lower().strip() for t in job_locations])
+    exact = np.array([[a == b for b in j_locs] for a in s_locs], dtype=bool).reshape(len(s_locs), len(j_locs))
+    if model is not None:
+        boost = np.array([[_geographic_boost(a, b) for b in j_locs] for a in s_locs]).reshape(exact.shape)
+        location = np.minimum(1.0, np.maximum(cosine_similarity_matrix(
+            embed_texts(s_locs, model), embed_texts(j_locs, model)
+        ), 0.0) + boost)
+        location[exact] = 1.0
+    else:
+        location = exact.astype(float)
+    missing = np.array([not a for a in s_locs])[:, None] | np.array([not b for b in j_locs])[None, :]
+    location[missing] = 0.0
+    location = location[np.ix_(s_loc_idx, j_loc_idx)]
+    
+    # CGPA: scored once per distinct (student CGPA, job minimum) combination
+    s_cgpas, s_cgpa_idx = _unique_inverse(list(student_cgpas))
+    j_cgpas, j_cgpa_idx = _unique_inverse(list(job_min_cgpas))
+    if model is not None:
+        cgpa = [[glove_cgpa_match_score(a, b, model) for b in j_cgpas] for a in s_cgpas]
+    else:
+        cgpa = [[norm_fallback(a, b) for b in j_cgpas] for a in s_cgpas]
+    cgpa = np.array(cgpa, dtype=float).reshape(len(s_cgpas), len(j_cgpas))[np.ix_(s_cgpa_idx, j_cgpa_idx)]
+    
+    total = skill_weight * skill + location_weight * location + cgpa_weight * cgpa
+    return total, {
+        "skill_score": skill,
+        "location_score": location,
+        "cgpa_score": cgpa,
+        "weights": {"skill": skill_weight, "location": location_weight, "cgpa": cgpa_weight}
+    }
+
 if __name__ == "__main__":
     GLOVE_PATH = "glove.6B.200d.txt" 
     
@@ -0,0 +1,45 @@
+# app/responses.py
+from collections.abc import Mapping
+from decimal import Decimal
+from typing import Any, AsyncIterable
+
+import orjson
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Serialize the types orjson does not handle natively"""
+    if isinstance(obj, Mapping):
+        # SQLAlchemy RowMapping
+        return dict(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+    Return an instance directly from a handler to skip FastAPI's
+    jsonable_encoder pass; DB rows (RowMapping) can be passed as-is.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class NDJSONResponse(StreamingResponse):
+    """
+    Newline-delimited JSON, one orjson-encoded line per row, sent as rows
+    arrive from an async iterable (e.g. AsyncSession.stream(...).mappings()).
+    """
+    media_type = "application/x-ndjson"
+
+    def __init__(self, rows: AsyncIterable[Any], **kwargs: Any) -> None:
+        super().__init__(self._encode(rows), **kwargs)
+
+    @staticmethod
+    async def _encode(rows: AsyncIterable[Any]):
+        async for row in rows:
+            yield orjson.dumps(row, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS) + b"\n"
@@ -6,8 +6,10 @@ from app.allocation import run_allocation
 from pydantic import BaseModel
 from typing import Dict, Any, Optional, List
 import json
+import logging
 
 router = APIRouter(prefix="/allocation", tags=["allocation"])
+logger = logging.getLogger(__name__)
 
 class AllocationConfig(BaseModel):
     emails: Optional[List[str]] = None  # Add this line
@@ -106,9 +108,7 @@ async def trigger_allocation(
         
     except Exception as e:
         # Log the full error for debugging
-        import traceback
-        print(f"Allocation error: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Allocation failed")
         
         # Check if it's a specific known error
         error_msg = str(e)
@@ -371,9 +371,7 @@ async def get_allocation_runs(
             }
         }
     except Exception as e:
-        import traceback
-        print(f"Error fetching runs: {e}")
-        print(traceback.format_exc())
+        logger.exception("Failed to fetch allocation runs")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch allocation runs: {str(e)}"
@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, Dict, Any, List
 from app.db import get_db
+import re
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+# Splits comma-separated skills and trims surrounding whitespace in one pass
+_SKILL_SPLIT = re.compile(r"\s*,\s*")
+
 # Models
 class CandidateLogin(BaseModel):
     email: EmailStr
@@ -59,7 +64,7 @@ async def login_candidate(login_data: CandidateLogin, db: AsyncSession = Depends
     """
     Authenticate a candidate using email and password from the student table
     """
-    # Query the database using the email_password index
+    # Query the database using the unique email index
     query = text("""
         SELECT student_id, name, email 
         FROM student 
@@ -166,7 +171,7 @@ async def register_candidate(student_data: CandidateRegister, db: AsyncSession =
         # If skills were submitted, add them to the student_skill table
         if student_data.skills_text:
             # Extract skill names from the comma-separated text
-            skill_names = [s.strip() for s in student_data.skills_text.split(",")]
+            skill_names = [n for n in _SKILL_SPLIT.split(student_data.skills_text.strip()) if n]
             
             # Get skill IDs for these names
             for skill_name in skill_names:
@@ -249,30 +254,9 @@ async def register_company(company_data: CompanyRegister, db: AsyncSession = Dep
     """
     Register a new company
     """
-    # Check if the email already exists
-    check_query = text("SELECT org_id FROM organization WHERE org_email = :email")
-    result = await db.execute(check_query, {"email": company_data.email})
-    existing_company_email = result.scalar()
-    
-    # Check if the company name already exists
-    check_name_query = text("SELECT org_id FROM organization WHERE org_name = :name")
-    name_result = await db.execute(check_name_query, {"name": company_data.name})
-    existing_company_name = name_result.scalar()
-    
-    if existing_company_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-        
-    if existing_company_name:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Company name already exists"
-        )
-
     try:
-        # Insert new company
+        # Insert new company; the UNIQUE constraints on org_email and org_name
+        # reject duplicates atomically, so no pre-check round-trips are needed
         insert_query = text("""
             INSERT INTO organization (
                 org_name, org_email, org_website, password
@@ -299,6 +283,22 @@ async def register_company(company_data: CompanyRegister, db: AsyncSession = Dep
             "org_email": company_data.email
         }
         
+    except IntegrityError as e:
+        await db.rollback()
+        if "org_email" in str(e.orig):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
+        if "org_name" in str(e.orig):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Company name already exists"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to register company: {str(e)}"
+        )
     except Exception as e:
         await db.rollback()
         raise HTTPException(
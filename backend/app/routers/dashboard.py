@@ -3,9 +3,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from pydantic import BaseModel
 from typing import List, Optional
+import logging
 from app.db import get_db
+from app.responses import ORJSONResponse
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+logger = logging.getLogger(__name__)
 
 # Response models
 class TopMatch(BaseModel):
@@ -27,19 +30,20 @@ class ProfileCompletion(BaseModel):
     completion_percentage: int
     missing_fields: List[str]
 
-@router.get("/matches/student/{student_id}", response_model=List[TopMatch])
+@router.get("/matches/student/{student_id}", responses={200: {"model": List[TopMatch]}})
 async def get_top_matches(student_id: int, limit: int = 3, db: AsyncSession = Depends(get_db)):
     """Get top matches for a student based on match scores"""
     try:
-        # Query top matches
+        # Query top matches; rows already have the TopMatch shape, so they are
+        # serialized directly without a per-row Pydantic validation pass
         result = await db.execute(text("""
             SELECT 
                 i.internship_id,
                 i.title,
                 i.org_name,
                 i.location,
-                i.description,
-                mr.final_score
+                LEFT(i.description, 160) AS description,
+                (mr.final_score * 10)::float8 AS final_score
             FROM match_result mr
             JOIN internship i ON mr.internship_id = i.internship_id
             WHERE mr.student_id = :student_id
@@ -47,29 +51,14 @@ async def get_top_matches(student_id: int, limit: int = 3, db: AsyncSession = De
             LIMIT :limit
         """), {"student_id": student_id, "limit": limit})
         
-        matches = result.mappings().all()
-        
-        if not matches:
-            # Return empty array if no matches
-            return []
-            
-        return [
-            {
-                "internship_id": match["internship_id"],
-                "title": match["title"],
-                "org_name": match["org_name"],
-                "location": match["location"],
-                "description": match["description"],
-                "final_score": match["final_score"] * 10
-            } for match in matches
-        ]
+        return ORJSONResponse(result.mappings().all())
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get matches: {str(e)}"
         )
 
-@router.get("/preferences/student/{student_id}", response_model=List[Preference])
+@router.get("/preferences/student/{student_id}", responses={200: {"model": List[Preference]}})
 async def get_student_preferences(student_id: int, db: AsyncSession = Depends(get_db)):
     """Get all preferences for a student with internship details"""
     try:
@@ -87,27 +76,14 @@ async def get_student_preferences(student_id: int, db: AsyncSession = Depends(ge
                     ELSE 'Interested'
                 END as status,
                 -- Format date as relative
-                TO_CHAR(p.created_at, 'DD Mon YYYY') as date_created
+                TO_CHAR(p.created_at, 'DD Mon YYYY') as date
             FROM preference p
             JOIN internship i ON i.internship_id = p.internship_id
             WHERE p.student_id = :student_id
             ORDER BY p.ranked ASC
         """), {"student_id": student_id})
         
-        preferences = result.mappings().all()
-        
-        if not preferences:
-            return []
-            
-        return [
-            {
-                "internship_id": pref["internship_id"],
-                "title": pref["title"],
-                "org_name": pref["org_name"],
-                "status": pref["status"],
-                "date": pref["date_created"]
-            } for pref in preferences
-        ]
+        return ORJSONResponse(result.mappings().all())
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -202,10 +178,8 @@ async def get_profile_completion(student_id: int, db: AsyncSession = Depends(get
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        # Print the full error for debugging
-        import traceback
-        print(f"Error calculating profile completion: {str(e)}")
-        print(traceback.format_exc())
+        # Log the full error for debugging
+        logger.exception("Failed to calculate profile completion for student_id=%s", student_id)
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
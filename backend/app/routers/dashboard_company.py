@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from app.db import get_db
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from datetime import datetime
 
 router = APIRouter(prefix="/companies", tags=["companies"])
 
@@ -27,10 +28,20 @@ async def get_company_info(company_id: int, db: AsyncSession = Depends(get_db)):
     return dict(company)
 
 @router.get("/{company_id}/internships")
-async def get_company_internships(company_id: int, db: AsyncSession = Depends(get_db)):
-    """Get all internships posted by a company"""
+async def get_company_internships(
+    company_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[datetime] = None,
+    cursor_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a page of internships posted by a company, newest first.
+
+    Pass the ``next`` values from the previous page as ``cursor`` and
+    ``cursor_id`` to fetch the following page.
+    """
     # Query to get internships with applicant and match counts
-    query = text("""
+    query = """
         SELECT 
             i.internship_id, 
             i.title, 
@@ -54,14 +65,29 @@ async def get_company_internships(company_id: int, db: AsyncSession = Depends(ge
             internship i
         WHERE 
             i.org_id = :company_id
-        ORDER BY 
-            i.created_at DESC
-    """)
-    
-    result = await db.execute(query, {"company_id": company_id})
-    internships = [dict(row) for row in result.mappings().all()]
-    
-    return internships
+    """
+    params = {"company_id": company_id, "limit": limit}
+
+    # Keyset pagination: continue strictly after the last row of the previous page
+    if cursor is not None:
+        query += " AND (i.created_at, i.internship_id) < (:cursor, :cursor_id)"
+        params["cursor"] = cursor
+        params["cursor_id"] = cursor_id if cursor_id is not None else 2**63 - 1
+
+    query += " ORDER BY i.created_at DESC, i.internship_id DESC LIMIT :limit"
+
+    result = await db.execute(text(query), params)
+    internships = [dict(row) for row in result.mappings()]
+
+    next_cursor = None
+    if len(internships) == limit:
+        last = internships[-1]
+        next_cursor = {
+            "cursor": last["created_at"].isoformat(),
+            "cursor_id": last["internship_id"]
+        }
+
+    return {"items": internships, "next": next_cursor}
 
 @router.get("/{company_id}/dashboard-stats")
 async def get_company_dashboard_stats(company_id: int, db: AsyncSession = Depends(get_db)):
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,14 +10,31 @@ from ..ensemble_allocation import run_ensemble_allocation, ensemble_config
 
 router = APIRouter(prefix="/allocation/ensemble", tags=["allocation"])
 
+# Backpressure for allocation runs: each run holds a pooled connection for its
+# whole duration, so only a few may run at once and only a few may wait
+MAX_CONCURRENT_ALLOCATIONS = int(os.getenv("MAX_CONCURRENT_ALLOCATIONS", "2"))
+MAX_QUEUED_ALLOCATIONS = int(os.getenv("MAX_QUEUED_ALLOCATIONS", "4"))
+_ALLOC_SEM = asyncio.Semaphore(MAX_CONCURRENT_ALLOCATIONS)
+_alloc_waiting = 0
+
 class EnsembleConfigUpdate(BaseModel):
-    ensemble_method: Optional[str] = Field(None, description="Ensemble method: 'weighted', 'max_score', or 'voting'")
+    ensemble_method: Optional[str] = Field(None, description="Ensemble method: 'weighted', 'max_score', 'voting', or 'rank'")
     method_weights: Optional[Dict[str, float]] = Field(None, description="Weights for each allocation method")
     min_score_threshold: Optional[float] = Field(None, description="Minimum score threshold")
     skill_weight: Optional[float] = Field(None, description="Weight for skill matching")
     location_weight: Optional[float] = Field(None, description="Weight for location matching")
     cgpa_weight: Optional[float] = Field(None, description="Weight for CGPA matching")
 
+# Component weights apply to both the traditional and the GloVe scorer;
+# every other EnsembleConfigUpdate field maps to the config key of the same name
+_CONFIG_UPDATE_TARGETS = {
+    "skill_weight": ("traditional_weights.skill_weight", "glove_weights.skill_weight"),
+    "location_weight": ("traditional_weights.location_weight", "glove_weights.location_weight"),
+    "cgpa_weight": ("traditional_weights.cgpa_weight", "glove_weights.cgpa_weight"),
+}
+# Fields where an empty value ("" / {}) means "leave unchanged", like null
+_IGNORE_EMPTY_UPDATES = {"ensemble_method", "method_weights"}
+
 class EnsembleAllocationRequest(BaseModel):
     emails: Optional[List[str]] = Field(None, description="Limit allocation to these students (optional)")
     respect_existing: bool = Field(True, description="Respect existing allocations")
@@ -33,16 +52,32 @@ async def run_allocation(
     request: EnsembleAllocationRequest,
     db: AsyncSession = Depends(get_db)
 ):
-    try:
-        run_id = await run_ensemble_allocation(
-            db=db,
-            scope_emails=request.emails,
-            respect_existing=request.respect_existing,
-            skill_weight=request.skill_weight,
-            location_weight=request.location_weight,
-            cgpa_weight=request.cgpa_weight,
-            ensemble_method=request.ensemble_method
+    global _alloc_waiting
+    if _ALLOC_SEM.locked() and _alloc_waiting >= MAX_QUEUED_ALLOCATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many allocation runs in progress, try again later",
+            headers={"Retry-After": "5"}
         )
+    
+    try:
+        _alloc_waiting += 1
+        try:
+            await _ALLOC_SEM.acquire()
+        finally:
+            _alloc_waiting -= 1
+        try:
+            run_id = await run_ensemble_allocation(
+                db=db,
+                scope_emails=request.emails,
+                respect_existing=request.respect_existing,
+                skill_weight=request.skill_weight,
+                location_weight=request.location_weight,
+                cgpa_weight=request.cgpa_weight,
+                ensemble_method=request.ensemble_method
+            )
+        finally:
+            _ALLOC_SEM.release()
         return {
             "run_id": run_id,
             "message": "Ensemble allocation completed successfully"
@@ -51,32 +86,26 @@ async def run_allocation(
         raise HTTPException(status_code=500, detail=f"Allocation failed: {str(e)}")
 
 @router.get("/config")
-async def get_ensemble_config():
-    """Get current ensemble configuration"""
+async def get_ensemble_config(request: Request, response: Response):
+    """Get current ensemble configuration (supports If-None-Match revalidation)"""
+    etag = ensemble_config.etag()
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
     return ensemble_config.config
 
 @router.post("/config")
 async def update_ensemble_config(config_update: EnsembleConfigUpdate):
     """Update ensemble configuration parameters"""
-    if config_update.ensemble_method:
-        ensemble_config.update("ensemble_method", config_update.ensemble_method)
-    
-    if config_update.method_weights:
-        ensemble_config.update("method_weights", config_update.method_weights)
-    
-    if config_update.min_score_threshold is not None:
-        ensemble_config.update("min_score_threshold", config_update.min_score_threshold)
-    
-    if config_update.skill_weight is not None:
-        ensemble_config.update("traditional_weights.skill_weight", config_update.skill_weight)
-        ensemble_config.update("glove_weights.skill_weight", config_update.skill_weight)
-    
-    if config_update.location_weight is not None:
-        ensemble_config.update("traditional_weights.location_weight", config_update.location_weight)
-        ensemble_config.update("glove_weights.location_weight", config_update.location_weight)
+    updates = {}
+    for field, value in config_update.model_dump(exclude_none=True).items():
+        if field in _IGNORE_EMPTY_UPDATES and not value:
+            continue
+        for key in _CONFIG_UPDATE_TARGETS.get(field, (field,)):
+            updates[key] = value
     
-    if config_update.cgpa_weight is not None:
-        ensemble_config.update("traditional_weights.cgpa_weight", config_update.cgpa_weight)
-        ensemble_config.update("glove_weights.cgpa_weight", config_update.cgpa_weight)
+    if updates:
+        ensemble_config.update_many(updates)
     
     return {"message": "Configuration updated", "config": ensemble_config.config}
\ No newline at end of file
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, HTTPException, status
 from sqlalchemy import text
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
-from app.db import get_db
-import json
+from app.db import AsyncSessionLocalRO
+from app.responses import ORJSONResponse
+import asyncio
+import logging
+from contextlib import suppress
+from functools import lru_cache
 
 router = APIRouter(prefix="/internships_details", tags=["internships_details"])
+logger = logging.getLogger(__name__)
 
 # Language code to full name mapping
 LANGUAGE_MAP = {
@@ -37,6 +41,28 @@ LANGUAGE_MAP = {
     "ar": "Arabic",
     # Add more languages as needed
 }
+_LANG_MAP_GET = LANGUAGE_MAP.get
+
+
+@lru_cache(maxsize=256)
+def _translate_language_items(items):
+    """Memoized code -> full name translation; the result is shared, don't mutate it"""
+    return {_LANG_MAP_GET(lang, lang): value for lang, value in items}
+
+
+def _translate_languages(languages):
+    """Convert language codes to full names (list of codes or {code: level})"""
+    if isinstance(languages, list):
+        items = tuple((lang, "") for lang in languages)
+    elif isinstance(languages, dict):
+        items = tuple(languages.items())
+    else:
+        return languages
+    try:
+        return _translate_language_items(items)
+    except TypeError:
+        # Unhashable values (e.g. nested objects) can't be cached
+        return {_LANG_MAP_GET(lang, lang): value for lang, value in items}
 
 # Response model for internship details
 class InternshipDetail(BaseModel):
@@ -58,47 +84,115 @@ class InternshipDetail(BaseModel):
     languages_required_json: Optional[Dict[str, Any]]
     match_score: Optional[float]
 
-@router.get("/{internship_id}", response_model=InternshipDetail)
-async def get_internship_details(internship_id: int, student_id: Optional[int] = None, db: AsyncSession = Depends(get_db)):
+# One statement serves a whole batch of (internship_id, student_id) requests;
+# a NULL student_id never joins a match row, so match_score stays NULL
+_DETAILS_BATCH_STMT = text("""
+    SELECT 
+        req.internship_id AS req_internship_id,
+        req.student_id AS req_student_id,
+        i.internship_id,
+        i.title,
+        i.org_name,
+        i.description,
+        i.location,
+        i.min_cgpa,
+        i.wage_min,
+        i.wage_max,
+        i.capacity,
+        i.is_shift_night,
+        i.req_skills_text,
+        i.job_role_code,
+        i.nsqf_required_level,
+        i.min_age,
+        i.category_quota_json,
+        i.languages_required_json,
+        (mr.final_score * 10) as match_score
+    FROM unnest(CAST(:internship_ids AS bigint[]), CAST(:student_ids AS bigint[]))
+        AS req(internship_id, student_id)
+    JOIN internship i ON i.internship_id = req.internship_id AND i.is_active = true
+    LEFT JOIN match_result mr ON mr.internship_id = i.internship_id AND mr.student_id = req.student_id
+""")
+
+
+class DetailsBatcher:
+    """
+    Coalesces concurrent detail lookups into a single query.
+    A batch is dispatched when it holds max_batch requests or max_wait_ms
+    has passed since its first request, whichever comes first.
+    """
+
+    def __init__(self, max_batch: int = 64, max_wait_ms: float = 10):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def fetch(self, internship_id: int, student_id: Optional[int]):
+        """Return the detail row for one request, or None if the internship isn't found"""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._consume())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((internship_id, student_id, future))
+        return await future
+
+    async def close(self):
+        """Stop the consumer task; call on application shutdown"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        # Requests still queued will never be dispatched
+        while not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            future.cancel()
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch):
+        keys = list({(internship_id, student_id) for internship_id, student_id, _ in batch})
+        try:
+            async with AsyncSessionLocalRO() as session:
+                result = await session.execute(_DETAILS_BATCH_STMT, {
+                    "internship_ids": [internship_id for internship_id, _ in keys],
+                    "student_ids": [student_id for _, student_id in keys],
+                })
+                rows = {}
+                for row in result.mappings():
+                    rows.setdefault((row["req_internship_id"], row["req_student_id"]), row)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for internship_id, student_id, future in batch:
+            if not future.done():
+                future.set_result(rows.get((internship_id, student_id)))
+
+
+details_batcher = DetailsBatcher()
+
+@router.get("/{internship_id}", responses={200: {"model": InternshipDetail}})
+async def get_internship_details(internship_id: int, student_id: Optional[int] = None):
     """Get detailed information about a specific internship"""
     try:
-        # Base query for internship details
-        query = """
-            SELECT 
-                i.internship_id,
-                i.title,
-                i.org_name,
-                i.description,
-                i.location,
-                i.min_cgpa,
-                i.wage_min,
-                i.wage_max,
-                i.capacity,
-                i.is_shift_night,
-                i.req_skills_text,
-                i.job_role_code,
-                i.nsqf_required_level,
-                i.min_age,
-                i.category_quota_json,
-                i.languages_required_json
-        """
-        
-        # If student ID is provided, also get match score
-        if student_id:
-            query += ", (mr.final_score * 10) as match_score "
-            query += "FROM internship i LEFT JOIN match_result mr ON i.internship_id = mr.internship_id AND mr.student_id = :student_id "
-        else:
-            query += ", NULL as match_score "
-            query += "FROM internship i "
-            
-        query += "WHERE i.internship_id = :internship_id AND i.is_active = true"
-        
-        result = await db.execute(
-            text(query), 
-            {"internship_id": internship_id, "student_id": student_id}
-        )
-        
-        internship = result.mappings().first()
+        internship = await details_batcher.fetch(internship_id, student_id or None)
         
         if not internship:
             raise HTTPException(
@@ -111,42 +205,12 @@ async def get_internship_details(internship_id: int, student_id: Optional[int] =
         if internship["req_skills_text"]:
             required_skills = [s.strip() for s in internship["req_skills_text"].split(",") if s.strip()]
             
-        # Parse JSON fields
-        category_quota = None
-        if internship["category_quota_json"]:
-            try:
-                if isinstance(internship["category_quota_json"], str):
-                    category_quota = json.loads(internship["category_quota_json"])
-                else:
-                    category_quota = internship["category_quota_json"]
-            except:
-                category_quota = {}
-                
-        languages_required = None
-        if internship["languages_required_json"]:
-            try:
-                if isinstance(internship["languages_required_json"], str):
-                    # Parse JSON string
-                    languages_required = json.loads(internship["languages_required_json"])
-                else:
-                    # Use the value directly
-                    languages_required = internship["languages_required_json"]
-                
-                # Convert language codes to full names
-                if isinstance(languages_required, list):
-                    # For array format: Convert list of codes to dictionary with full names
-                    languages_required = {LANGUAGE_MAP.get(lang, lang): "" for lang in languages_required}
-                elif isinstance(languages_required, dict):
-                    # For object format: Convert dictionary keys from codes to full names
-                    languages_required = {
-                        LANGUAGE_MAP.get(lang, lang): value 
-                        for lang, value in languages_required.items()
-                    }
-            except Exception as e:
-                print(f"Error parsing languages_required_json: {e}")
-                languages_required = {}
+        # JSON fields arrive already decoded by the driver's json/jsonb codec
+        category_quota = internship["category_quota_json"]
+        languages_required = _translate_languages(internship["languages_required_json"])
             
-        return {
+        # Trusted DB row: serialize directly instead of re-validating through InternshipDetail
+        return ORJSONResponse({
             "internship_id": internship["internship_id"],
             "title": internship["title"],
             "org_name": internship["org_name"],
@@ -156,7 +220,7 @@ async def get_internship_details(internship_id: int, student_id: Optional[int] =
             "wage_min": internship["wage_min"],
             "wage_max": internship["wage_max"],
             "capacity": internship["capacity"],
-            "is_shift_night": internship["is_shift_night"],
+            "is_shift_night": bool(internship["is_shift_night"]),
             "required_skills": required_skills,
             "job_role_code": internship["job_role_code"],
             "nsqf_required_level": internship["nsqf_required_level"],
@@ -164,11 +228,11 @@ async def get_internship_details(internship_id: int, student_id: Optional[int] =
             "category_quota_json": category_quota,
             "languages_required_json": languages_required,
             "match_score": internship["match_score"]
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error getting internship details: {str(e)}")
+        logger.exception("Failed to get internship details for internship_id=%s", internship_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get internship details: {str(e)}"
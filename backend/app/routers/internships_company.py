@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from app.db import get_db
-from typing import List, Dict, Any
-from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from app.db import get_db, get_db_ro, AsyncSessionLocalRO
+from app.responses import ORJSONResponse, NDJSONResponse
+from app.routers.search import refresh_filter_options
+from typing import List, Dict, Any, Optional, Union
+from decimal import Decimal
+from pydantic import BaseModel, ConfigDict, field_validator
+import logging
+import orjson
 
 class ShortlistRequest(BaseModel):
     student_id: int
@@ -12,56 +18,86 @@ class ShortlistRequest(BaseModel):
 class StatusUpdateRequest(BaseModel):
     is_active: bool
 
+
+class InternshipCreate(BaseModel):
+    """Fields accepted when posting internships (single or bulk)"""
+    # pincode may arrive as a number from form inputs
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    org_id: Optional[int] = None
+    org_name: Optional[str] = None
+    title: str
+    description: Optional[str] = None
+    req_skills_text: Optional[str] = None
+    min_cgpa: Decimal = Decimal("0")
+    location: Optional[str] = None
+    pincode: Optional[str] = None
+    capacity: int = 1
+    job_role_code: Optional[str] = None
+    nsqf_required_level: Optional[int] = None
+    min_age: Optional[int] = None
+    # JSON columns: already-encoded JSON strings or plain lists/objects
+    genders_allowed: Optional[Union[str, list, dict]] = None
+    languages_required_json: Optional[Union[str, list, dict]] = None
+    is_shift_night: bool = False
+    wage_min: Optional[int] = None
+    wage_max: Optional[int] = None
+    category_quota_json: Optional[Union[str, list, dict]] = None
+    is_active: bool = True
+
+    @field_validator("genders_allowed", "languages_required_json", "category_quota_json")
+    @classmethod
+    def _encode_json(cls, value):
+        # The asyncpg json codec takes the encoded text, for both INSERT and COPY
+        if value is None or isinstance(value, str):
+            return value
+        return orjson.dumps(value).decode()
+
 router = APIRouter(prefix="/internships", tags=["internships"])
+logger = logging.getLogger(__name__)
+
+# Columns supplied by the client when posting internships
+_INTERNSHIP_COLUMNS = (
+    "org_id", "org_name", "title", "description", "req_skills_text", "min_cgpa",
+    "location", "pincode", "capacity", "job_role_code", "nsqf_required_level",
+    "min_age", "genders_allowed", "languages_required_json", "is_shift_night",
+    "wage_min", "wage_max", "category_quota_json", "is_active",
+)
+
+_INSERT_INTERNSHIP_STMT = text("""
+    INSERT INTO internship (
+        org_id, org_name ,title, description, req_skills_text, min_cgpa, 
+        location, pincode, capacity, job_role_code, nsqf_required_level,
+        min_age, genders_allowed, languages_required_json, is_shift_night,
+        wage_min, wage_max, category_quota_json, is_active
+    )
+    VALUES (
+        :org_id, :org_name, :title, :description, :req_skills_text, :min_cgpa,
+        :location, :pincode, :capacity, :job_role_code, :nsqf_required_level,
+        :min_age, :genders_allowed, :languages_required_json, :is_shift_night,
+        :wage_min, :wage_max, :category_quota_json, :is_active
+    )
+    RETURNING internship_id
+""")
 
 # Example backend endpoint (this would be in your FastAPI app)
 @router.post("/create_internship", status_code=status.HTTP_201_CREATED)
 async def create_internship(
-    internship: dict,
+    internship: InternshipCreate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new internship"""
-    query = text("""
-        INSERT INTO internship (
-            org_id, org_name ,title, description, req_skills_text, min_cgpa, 
-            location, pincode, capacity, job_role_code, nsqf_required_level,
-            min_age, genders_allowed, languages_required_json, is_shift_night,
-            wage_min, wage_max, category_quota_json, is_active
-        )
-        VALUES (
-            :org_id, :org_name, :title, :description, :req_skills_text, :min_cgpa,
-            :location, :pincode, :capacity, :job_role_code, :nsqf_required_level,
-            :min_age, :genders_allowed, :languages_required_json, :is_shift_night,
-            :wage_min, :wage_max, :category_quota_json, :is_active
-        )
-        RETURNING internship_id
-    """)
-    
     try:
-        result = await db.execute(query, {
-            "org_id": internship["org_id"],
-            "org_name": internship["org_name"],
-            "title": internship["title"],
-            "description": internship["description"],
-            "req_skills_text": internship["req_skills_text"],
-            "min_cgpa": internship["min_cgpa"],
-            "location": internship["location"],
-            "pincode": internship["pincode"],
-            "capacity": internship["capacity"],
-            "job_role_code": internship["job_role_code"],
-            "nsqf_required_level": internship["nsqf_required_level"],
-            "min_age": internship["min_age"],
-            "genders_allowed": internship["genders_allowed"],
-            "languages_required_json": internship["languages_required_json"],
-            "is_shift_night": internship["is_shift_night"],
-            "wage_min": internship["wage_min"],
-            "wage_max": internship["wage_max"],
-            "category_quota_json": internship["category_quota_json"],
-            "is_active": internship["is_active"]
-        })
+        result = await db.execute(
+            _INSERT_INTERNSHIP_STMT,
+            {column: getattr(internship, column) for column in _INTERNSHIP_COLUMNS}
+        )
         
         internship_id = result.scalar_one()
         await db.commit()
+        # Search filter options pick up the new values after the response is sent
+        background_tasks.add_task(refresh_filter_options)
         
         return {"internship_id": internship_id, "message": "Internship created successfully"}
     except Exception as e:
@@ -71,22 +107,52 @@ async def create_internship(
             detail=f"Failed to create internship: {str(e)}"
         )
 
-@router.get("/{internship_id}")
-async def get_internship(internship_id: int, db: AsyncSession = Depends(get_db)):
+@router.post("/create_internships_bulk", status_code=status.HTTP_201_CREATED)
+async def create_internships_bulk(
+    internships: List[InternshipCreate],
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
+):
+    """Create many internships in one COPY (same fields as /create_internship)"""
+    try:
+        records = [
+            tuple(getattr(internship, column) for column in _INTERNSHIP_COLUMNS)
+            for internship in internships
+        ]
+        
+        # COPY goes through the raw asyncpg connection inside the session's transaction
+        conn = await db.connection()
+        raw_conn = await conn.get_raw_connection()
+        await raw_conn.driver_connection.copy_records_to_table(
+            "internship", records=records, columns=list(_INTERNSHIP_COLUMNS)
+        )
+        await db.commit()
+        background_tasks.add_task(refresh_filter_options)
+        
+        return {"created": len(records), "message": "Internships created successfully"}
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create internships: {str(e)}"
+        )
+
+_INTERNSHIP_STMT = text("""
+    SELECT 
+        i.*,
+        o.org_name
+    FROM 
+        internship i
+    JOIN 
+        organization o ON i.org_id = o.org_id
+    WHERE 
+        i.internship_id = :internship_id
+""")
+
+@router.get("/{internship_id}", response_class=ORJSONResponse)
+async def get_internship(internship_id: int, db: AsyncSession = Depends(get_db_ro)):
     """Get internship details by ID"""
-    query = text("""
-        SELECT 
-            i.*,
-            o.org_name
-        FROM 
-            internship i
-        JOIN 
-            organization o ON i.org_id = o.org_id
-        WHERE 
-            i.internship_id = :internship_id
-    """)
-    
-    result = await db.execute(query, {"internship_id": internship_id})
+    result = await db.execute(_INTERNSHIP_STMT, {"internship_id": internship_id})
     internship = result.mappings().first()
     
     if not internship:
@@ -95,54 +161,98 @@ async def get_internship(internship_id: int, db: AsyncSession = Depends(get_db))
             detail="Internship not found"
         )
     
-    return dict(internship)
+    # RowMapping is handed to orjson as-is (see ORJSONResponse)
+    return ORJSONResponse(internship)
 
-@router.get("/{internship_id}/candidates")
-async def get_internship_candidates(internship_id: int, db: AsyncSession = Depends(get_db)):
-    """Get all candidates matched to an internship with their details and match scores"""
-    query = text("""
+# Skills are aggregated once for all matched students (one hash aggregate)
+# instead of a correlated subquery per candidate row
+_CANDIDATES_STMT = text("""
+    WITH sk AS (
         SELECT 
-            s.student_id,
-            s.name,
-            s.email,
-            s.degree,
-            s.grad_year,
-            s.cgpa,
-            s.location_pref as location,
-            s.skills_text,
-            m.final_score,
-            p.created_at as preference_date,
-            (
-                SELECT 
-                    array_agg(sr.name)
-                FROM 
-                    student_skill ss
-                JOIN 
-                    skill_ref sr ON ss.skill_code = sr.skill_code
-                WHERE 
-                    ss.student_id = s.student_id
-            ) as structured_skills
+            ss.student_id,
+            array_agg(sr.name) AS skills
         FROM 
-            match_result m
+            student_skill ss
         JOIN 
-            student s ON m.student_id = s.student_id
-        LEFT JOIN 
-            preference p ON p.student_id = s.student_id AND p.internship_id = m.internship_id
+            skill_ref sr ON ss.skill_code = sr.skill_code
         WHERE 
-            m.internship_id = :internship_id
-        ORDER BY 
-            m.final_score DESC
-    """)
+            ss.student_id IN (
+                SELECT student_id FROM match_result WHERE internship_id = :internship_id
+            )
+        GROUP BY 
+            ss.student_id
+    )
+    SELECT 
+        s.student_id,
+        s.name,
+        s.email,
+        s.degree,
+        s.grad_year,
+        s.cgpa,
+        s.location_pref as location,
+        s.skills_text,
+        m.final_score,
+        p.created_at as preference_date,
+        sk.skills as structured_skills
+    FROM 
+        match_result m
+    JOIN 
+        student s ON m.student_id = s.student_id
+    LEFT JOIN 
+        preference p ON p.student_id = s.student_id AND p.internship_id = m.internship_id
+    LEFT JOIN 
+        sk ON sk.student_id = s.student_id
+    WHERE 
+        m.internship_id = :internship_id
+    ORDER BY 
+        m.final_score DESC
+""")
+
+@router.get("/{internship_id}/candidates", response_class=NDJSONResponse)
+async def get_internship_candidates(internship_id: int):
+    """
+    Get all candidates matched to an internship with their details and match scores.
+    Rows are streamed as NDJSON while the server-side cursor is read.
+    """
+    # The query is started before the response so that a failure here is still a 500
+    session = AsyncSessionLocalRO()
+    try:
+        result = await session.stream(_CANDIDATES_STMT, {"internship_id": internship_id})
+    except Exception as e:
+        await session.close()
+        logger.exception("Failed to get internship candidates", extra={"internship_id": internship_id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get internship candidates: {str(e)}"
+        )
     
-    result = await db.execute(query, {"internship_id": internship_id})
-    candidates = [dict(row) for row in result.mappings().all()]
+    async def rows():
+        # The session stays open until the last row is sent, independent of when
+        # request dependencies are closed; errors past this point end the stream
+        try:
+            async for row in result.mappings():
+                yield row
+        except Exception:
+            logger.exception("Failed while streaming internship candidates", extra={"internship_id": internship_id})
+            raise
+        finally:
+            await session.close()
     
-    return candidates
+    return NDJSONResponse(rows())
 
 
 # Add this endpoint to your existing internships_company.py file
 
 
+# Single round-trip: the unique (internship_id, student_id) key makes a
+# repeat shortlist a no-op, and the foreign keys reject unknown ids
+_SHORTLIST_STMT = text("""
+    INSERT INTO shortlisted_candidates (internship_id, student_id)
+    VALUES (:internship_id, :student_id)
+    ON CONFLICT (internship_id, student_id) DO NOTHING
+    RETURNING student_id
+""")
+
 @router.post("/{internship_id}/shortlist", status_code=status.HTTP_200_OK)
 async def shortlist_candidate(
     internship_id: int, 
@@ -150,60 +260,39 @@ async def shortlist_candidate(
     db: AsyncSession = Depends(get_db)
 ):
     """Shortlist a candidate for an internship"""
-    
-    # Verify that the internship exists
-    internship_query = text("""
-        SELECT internship_id FROM internship WHERE internship_id = :internship_id
-    """)
-    
-    result = await db.execute(internship_query, {"internship_id": internship_id})
-    if not result.scalar_one_or_none():
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Internship not found"
-        )
-    
-    # Verify that the student exists
-    student_query = text("""
-        SELECT student_id FROM student WHERE student_id = :student_id
-    """)
-    
-    result = await db.execute(student_query, {"student_id": request.student_id})
-    if not result.scalar_one_or_none():
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Student not found"
-        )
-        
-    # Check if the student is already shortlisted
-    shortlist_check_query = text("""
-        SELECT 1 FROM shortlisted_candidates
-        WHERE internship_id = :internship_id AND student_id = :student_id
-    """)
-    
-    result = await db.execute(
-        shortlist_check_query, 
-        {"internship_id": internship_id, "student_id": request.student_id}
-    )
-    
-    if result.scalar_one_or_none():
-        # Already shortlisted, return success without making changes
-        return {"message": "Candidate was already shortlisted"}
-    
-    # Add to shortlisted candidates table
-    shortlist_query = text("""
-        INSERT INTO shortlisted_candidates (internship_id, student_id)
-        VALUES (:internship_id, :student_id)
-    """)
-    
     try:
-        await db.execute(
-            shortlist_query, 
+        result = await db.execute(
+            _SHORTLIST_STMT, 
             {"internship_id": internship_id, "student_id": request.student_id}
         )
+        inserted = result.scalar_one_or_none()
         await db.commit()
+        
+        if inserted is None:
+            # Already shortlisted, return success without making changes
+            return {"message": "Candidate was already shortlisted"}
         return {"message": "Candidate has been shortlisted successfully"}
         
+    except IntegrityError as e:
+        await db.rollback()
+        # asyncpg exposes the violated constraint on the wrapped driver error;
+        # fall back to the message text for other drivers. The FK names are
+        # declared on ShortlistedCandidate in models.py
+        constraint = getattr(e.orig.__cause__, "constraint_name", None) or str(e.orig)
+        if "internship_id_fkey" in constraint:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Internship not found"
+            )
+        if "student_id_fkey" in constraint:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Student not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to shortlist candidate: {str(e)}"
+        )
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -214,6 +303,13 @@ async def shortlist_candidate(
 
 
 
+_STATUS_UPDATE_STMT = text("""
+    UPDATE internship
+    SET is_active = :is_active
+    WHERE internship_id = :internship_id
+    RETURNING internship_id, title, is_active
+""")
+
 @router.patch("/{internship_id}/status", status_code=status.HTTP_200_OK)
 async def update_internship_status(
     internship_id: int,
@@ -221,16 +317,9 @@ async def update_internship_status(
     db: AsyncSession = Depends(get_db)
 ):
     """Update internship active status"""
-    query = text("""
-        UPDATE internship
-        SET is_active = :is_active
-        WHERE internship_id = :internship_id
-        RETURNING internship_id, title, is_active
-    """)
-    
     try:
         result = await db.execute(
-            query, 
+            _STATUS_UPDATE_STMT, 
             {"internship_id": internship_id, "is_active": status_update.is_active}
         )
         await db.commit()
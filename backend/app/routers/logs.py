@@ -1,12 +1,80 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text, desc, and_
+from sqlalchemy.sql.elements import TextClause
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, timedelta
-from app.db import get_db
+from enum import Enum
+from functools import lru_cache
+from fastapi.responses import StreamingResponse
+import asyncio
+import csv
+import io
+import logging
+import orjson
+from app.db import get_db, AsyncSessionLocal, AsyncSessionLocalRO
+from app.responses import ORJSONResponse
 
-router = APIRouter(prefix="/admin/logs", tags=["admin-logs"])
+router = APIRouter(prefix="/admin/logs", tags=["admin-logs"], default_response_class=ORJSONResponse)
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip when streaming an export
+_EXPORT_BATCH_SIZE = 1000
+
+# Column lists for the views over audit_log
+_AUDIT_COLUMNS = "audit_id, run_id, level, message, payload_json, created_at"
+# For now system logs are a mock structure on top of audit_log;
+# in a real implementation, you'd have a system_logs table
+_SYSTEM_COLUMNS = """
+    audit_id as log_id, level, message, 'system' as module,
+    NULL as user_id, NULL as ip_address, NULL as user_agent, created_at
+"""
+_SYSTEM_EXPORT_COLUMNS = "audit_id as log_id, level, message, 'system' as module, created_at"
+
+# WHERE clause for each optional bind parameter, in query order
+_LOG_FILTERS = (
+    ("level", "level = :level"),
+    ("run_id", "run_id = :run_id"),
+    ("module", "'system' = :module"),
+    ("start_date", "created_at >= :start_date"),
+    ("end_date", "created_at <= :end_date"),
+    ("search", "message ILIKE :search"),
+    # Keyset pagination: continue strictly after the last row of the previous page
+    ("cursor", "(created_at, audit_id) < (:cursor, :cursor_id)"),
+)
+
+@lru_cache(maxsize=256)
+def _log_query(columns: str, param_names: frozenset, paginated: bool) -> TextClause:
+    """Newest-first SELECT over audit_log, built once per filter combination"""
+    where = [clause for name, clause in _LOG_FILTERS if name in param_names]
+    query = f"SELECT {columns} FROM audit_log"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY created_at DESC, audit_id DESC"
+    if paginated:
+        query += " LIMIT :limit"
+    return text(query)
+
+# Query parameter choices
+class LogLevel(str, Enum):
+    INFO = "INFO"
+    WARN = "WARN"
+    ERROR = "ERROR"
+
+class SystemLogLevel(str, Enum):
+    INFO = "INFO"
+    WARN = "WARN"
+    ERROR = "ERROR"
+    DEBUG = "DEBUG"
+
+class LogType(str, Enum):
+    audit = "audit"
+    system = "system"
+
+class ExportFormat(str, Enum):
+    json = "json"
+    csv = "csv"
 
 # Response models
 class AuditLogResponse(BaseModel):
@@ -27,6 +95,18 @@ class SystemLogResponse(BaseModel):
     user_agent: Optional[str] = None
     created_at: datetime
 
+class LogCursor(BaseModel):
+    cursor: datetime
+    cursor_id: int
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogResponse]
+    next: Optional[LogCursor] = None
+
+class SystemLogPage(BaseModel):
+    items: List[SystemLogResponse]
+    next: Optional[LogCursor] = None
+
 class LogsSummary(BaseModel):
     total_audit_logs: int
     total_system_logs: int
@@ -34,63 +114,62 @@ class LogsSummary(BaseModel):
     warning_count_today: int
     info_count_today: int
 
-@router.get("/audit", response_model=List[AuditLogResponse])
+@router.get("/audit", response_model=AuditLogPage)
 async def get_audit_logs(
     limit: int = Query(50, ge=1, le=1000),
-    offset: int = Query(0, ge=0),
-    level: Optional[str] = Query(None, regex="^(INFO|WARN|ERROR)$"),
+    cursor: Optional[datetime] = None,
+    cursor_id: Optional[int] = None,
+    level: Optional[LogLevel] = None,
     run_id: Optional[int] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     search: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get audit logs with filtering and pagination"""
+    """Get audit logs with filtering, newest first.
+
+    Pass the ``next`` values from the previous page as ``cursor`` and
+    ``cursor_id`` to fetch the following page.
+    """
     try:
-        query = """
-            SELECT 
-                audit_id, run_id, level, message, payload_json, created_at
-            FROM audit_log
-            WHERE 1=1
-        """
-        params = {"limit": limit, "offset": offset}
+        params = {"limit": limit}
         
         # Add filters
         if level:
-            query += " AND level = :level"
-            params["level"] = level
-            
+            params["level"] = level.value
         if run_id:
-            query += " AND run_id = :run_id"
             params["run_id"] = run_id
-            
         if start_date:
-            query += " AND created_at >= :start_date"
             params["start_date"] = start_date
-            
         if end_date:
-            query += " AND created_at <= :end_date"
             params["end_date"] = end_date
-            
         if search:
-            query += " AND message ILIKE :search"
             params["search"] = f"%{search}%"
-            
-        query += " ORDER BY created_at DESC, audit_id DESC LIMIT :limit OFFSET :offset"
+        if cursor is not None:
+            params["cursor"] = cursor
+            params["cursor_id"] = cursor_id if cursor_id is not None else 2**63 - 1
         
-        result = await db.execute(text(query), params)
+        query = _log_query(_AUDIT_COLUMNS, frozenset(params), True)
+        result = await db.execute(query, params)
         logs = result.mappings().all()
         
-        return [
-            {
-                "audit_id": log["audit_id"],
-                "run_id": log["run_id"],
-                "level": log["level"],
-                "message": log["message"],
-                "payload_json": log["payload_json"],
-                "created_at": log["created_at"]
-            } for log in logs
-        ]
+        next_cursor = None
+        if len(logs) == limit:
+            next_cursor = {"cursor": logs[-1]["created_at"], "cursor_id": logs[-1]["audit_id"]}
+        
+        return {
+            "items": [
+                {
+                    "audit_id": log["audit_id"],
+                    "run_id": log["run_id"],
+                    "level": log["level"],
+                    "message": log["message"],
+                    "payload_json": log["payload_json"],
+                    "created_at": log["created_at"]
+                } for log in logs
+            ],
+            "next": next_cursor
+        }
         
     except Exception as e:
         raise HTTPException(
@@ -98,74 +177,65 @@ async def get_audit_logs(
             detail=f"Failed to fetch audit logs: {str(e)}"
         )
 
-@router.get("/system", response_model=List[SystemLogResponse])
+@router.get("/system", response_model=SystemLogPage)
 async def get_system_logs(
     limit: int = Query(50, ge=1, le=1000),
-    offset: int = Query(0, ge=0),
-    level: Optional[str] = Query(None, regex="^(INFO|WARN|ERROR|DEBUG)$"),
+    cursor: Optional[datetime] = None,
+    cursor_id: Optional[int] = None,
+    level: Optional[SystemLogLevel] = None,
     module: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     search: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get system logs with filtering and pagination"""
+    """Get system logs with filtering, newest first.
+
+    Pass the ``next`` values from the previous page as ``cursor`` and
+    ``cursor_id`` to fetch the following page.
+    """
     try:
-        # For now, we'll create a mock system logs table structure
-        # In a real implementation, you'd have a system_logs table
-        query = """
-            SELECT 
-                audit_id as log_id,
-                level,
-                message,
-                'system' as module,
-                NULL as user_id,
-                NULL as ip_address,
-                NULL as user_agent,
-                created_at
-            FROM audit_log
-            WHERE 1=1
-        """
-        params = {"limit": limit, "offset": offset}
+        params = {"limit": limit}
         
         # Add filters
         if level:
-            query += " AND level = :level"
-            params["level"] = level
-            
+            params["level"] = level.value
         if module:
-            query += " AND 'system' = :module"
             params["module"] = module
-            
         if start_date:
-            query += " AND created_at >= :start_date"
             params["start_date"] = start_date
-            
         if end_date:
-            query += " AND created_at <= :end_date"
             params["end_date"] = end_date
-            
         if search:
-            query += " AND message ILIKE :search"
             params["search"] = f"%{search}%"
-            
-        query += " ORDER BY created_at DESC, audit_id DESC LIMIT :limit OFFSET :offset"
+        if cursor is not None:
+            params["cursor"] = cursor
+            params["cursor_id"] = cursor_id if cursor_id is not None else 2**63 - 1
         
-        result = await db.execute(text(query), params)
+        query = _log_query(_SYSTEM_COLUMNS, frozenset(params), True)
+        
+        result = await db.execute(query, params)
         logs = result.mappings().all()
         
-        return [
-            {
-                "log_id": log["log_id"],
-                "level": log["level"],
-                "message": log["message"],
-                "module": log["module"],
-                "user_id": log["user_id"],
-                "ip_address": log["ip_address"],
-                "user_agent": log["user_agent"],
-                "created_at": log["created_at"]
-            } for log in logs
-        ]
+        next_cursor = None
+        if len(logs) == limit:
+            next_cursor = {"cursor": logs[-1]["created_at"], "cursor_id": logs[-1]["log_id"]}
+        
+        return {
+            "items": [
+                {
+                    "log_id": log["log_id"],
+                    "level": log["level"],
+                    "message": log["message"],
+                    "module": log["module"],
+                    "user_id": log["user_id"],
+                    "ip_address": log["ip_address"],
+                    "user_agent": log["user_agent"],
+                    "created_at": log["created_at"]
+                } for log in logs
+            ],
+            "next": next_cursor
+        }
         
     except Exception as e:
         raise HTTPException(
@@ -173,38 +243,53 @@ async def get_system_logs(
             detail=f"Failed to fetch system logs: {str(e)}"
         )
 
+# Seconds between refreshes of the audit_log_daily_counts materialized view
+LOG_COUNTS_REFRESH_INTERVAL = 60
+
+_REFRESH_LOG_COUNTS_STMT = text("""
+    REFRESH MATERIALIZED VIEW CONCURRENTLY audit_log_daily_counts
+""")
+
+async def refresh_log_counts():
+    """Rebuild the per-day log counts view behind /summary"""
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(_REFRESH_LOG_COUNTS_STMT)
+            await session.commit()
+    except Exception:
+        logger.exception("Failed to refresh log counts")
+
+async def refresh_log_counts_periodically(interval: float = LOG_COUNTS_REFRESH_INTERVAL):
+    """Keep audit_log_daily_counts current; runs for the app's lifetime"""
+    while True:
+        await refresh_log_counts()
+        await asyncio.sleep(interval)
+
 @router.get("/summary", response_model=LogsSummary)
 async def get_logs_summary(db: AsyncSession = Depends(get_db)):
     """Get logs summary statistics"""
     try:
-        # Get audit logs summary
-        audit_query = text("""
+        # Read from the per-day counts view instead of scanning audit_log
+        # (at most LOG_COUNTS_REFRESH_INTERVAL seconds behind); system logs
+        # live in the same table for now, so their total is the same count
+        summary_query = text("""
             SELECT 
-                COUNT(*) as total_audit_logs,
-                COUNT(CASE WHEN level = 'ERROR' AND created_at >= CURRENT_DATE THEN 1 END) as error_count_today,
-                COUNT(CASE WHEN level = 'WARN' AND created_at >= CURRENT_DATE THEN 1 END) as warning_count_today,
-                COUNT(CASE WHEN level = 'INFO' AND created_at >= CURRENT_DATE THEN 1 END) as info_count_today
-            FROM audit_log
+                COALESCE(SUM(cnt), 0)::bigint as total_audit_logs,
+                COALESCE(SUM(cnt) FILTER (WHERE level = 'ERROR' AND day >= CURRENT_DATE), 0)::bigint as error_count_today,
+                COALESCE(SUM(cnt) FILTER (WHERE level = 'WARN' AND day >= CURRENT_DATE), 0)::bigint as warning_count_today,
+                COALESCE(SUM(cnt) FILTER (WHERE level = 'INFO' AND day >= CURRENT_DATE), 0)::bigint as info_count_today
+            FROM audit_log_daily_counts
         """)
         
-        audit_result = await db.execute(audit_query)
-        audit_stats = audit_result.mappings().first()
-        
-        # For system logs, we'll use the same table for now
-        system_query = text("""
-            SELECT COUNT(*) as total_system_logs
-            FROM audit_log
-        """)
-        
-        system_result = await db.execute(system_query)
-        system_stats = system_result.mappings().first()
+        result = await db.execute(summary_query)
+        stats = result.mappings().first()
         
         return {
-            "total_audit_logs": audit_stats["total_audit_logs"],
-            "total_system_logs": system_stats["total_system_logs"],
-            "error_count_today": audit_stats["error_count_today"],
-            "warning_count_today": audit_stats["warning_count_today"],
-            "info_count_today": audit_stats["info_count_today"]
+            "total_audit_logs": stats["total_audit_logs"],
+            "total_system_logs": stats["total_audit_logs"],
+            "error_count_today": stats["error_count_today"],
+            "warning_count_today": stats["warning_count_today"],
+            "info_count_today": stats["info_count_today"]
         }
         
     except Exception as e:
@@ -218,7 +303,6 @@ async def add_test_logs(db: AsyncSession = Depends(get_db)):
     """Add test logs with different timestamps for demonstration"""
     try:
         from datetime import datetime, timedelta
-        import json
         
         test_logs = [
             {
@@ -258,17 +342,14 @@ async def add_test_logs(db: AsyncSession = Depends(get_db)):
             }
         ]
         
-        for log in test_logs:
-            await db.execute(text("""
-                INSERT INTO audit_log (run_id, level, message, payload_json, created_at)
-                VALUES (:run_id, :level, :message, :payload_json, :created_at)
-            """), {
-                "run_id": log["run_id"],
-                "level": log["level"],
-                "message": log["message"],
-                "payload_json": json.dumps(log["payload_json"]),
-                "created_at": log["created_at"]
-            })
+        # One executemany for all rows
+        await db.execute(text("""
+            INSERT INTO audit_log (run_id, level, message, payload_json, created_at)
+            VALUES (:run_id, :level, :message, :payload_json, :created_at)
+        """), [
+            {**log, "payload_json": orjson.dumps(log["payload_json"]).decode()}
+            for log in test_logs
+        ])
         
         await db.commit()
         
@@ -287,80 +368,85 @@ async def add_test_logs(db: AsyncSession = Depends(get_db)):
 
 @router.get("/export")
 async def export_logs(
-    log_type: str = Query(..., regex="^(audit|system)$"),
-    format: str = Query("json", regex="^(json|csv)$"),
+    log_type: LogType,
+    format: ExportFormat = ExportFormat.json,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    level: Optional[str] = None,
+    level: Optional[SystemLogLevel] = None,
     db: AsyncSession = Depends(get_db)
 ):
     """Export logs in JSON or CSV format"""
+    # System levels are a superset; audit exports only take the audit levels
+    if log_type is LogType.audit and level is not None and level.value not in LogLevel.__members__:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Invalid level for audit logs: {level.value}"
+        )
+    
     try:
-        if log_type == "audit":
-            query = """
-                SELECT 
-                    audit_id, run_id, level, message, payload_json, created_at
-                FROM audit_log
-                WHERE 1=1
-            """
-        else:
-            query = """
-                SELECT 
-                    audit_id as log_id, level, message, 'system' as module, created_at
-                FROM audit_log
-                WHERE 1=1
-            """
-            
         params = {}
         
-        # Add date filters
+        # Add filters
         if start_date:
-            query += " AND created_at >= :start_date"
             params["start_date"] = start_date
-            
         if end_date:
-            query += " AND created_at <= :end_date"
             params["end_date"] = end_date
-            
         if level:
-            query += " AND level = :level"
-            params["level"] = level
-            
-        query += " ORDER BY created_at DESC"
+            params["level"] = level.value
         
-        result = await db.execute(text(query), params)
-        logs = result.mappings().all()
+        columns = _AUDIT_COLUMNS if log_type is LogType.audit else _SYSTEM_EXPORT_COLUMNS
+        query = _log_query(columns, frozenset(params), False)
+        filename = f"{log_type.value}_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
-        if format == "csv":
-            # Convert to CSV format
-            import csv
-            import io
+        if format is ExportFormat.csv:
+            # The query is started before the response so that a failure here is still a 500
+            session = AsyncSessionLocalRO()
+            try:
+                result = await session.stream(
+                    query.execution_options(yield_per=_EXPORT_BATCH_SIZE), params
+                )
+            except Exception:
+                await session.close()
+                raise
             
-            output = io.StringIO()
-            if log_type == "audit":
-                fieldnames = ["audit_id", "run_id", "level", "message", "payload_json", "created_at"]
-            else:
-                fieldnames = ["log_id", "level", "message", "module", "created_at"]
-                
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
+            async def csv_chunks():
+                # Rows go out in batches as the server-side cursor yields them; the
+                # session stays open until the last batch is sent. Rows are written
+                # as plain tuples in SELECT order (no mapping/dict per row).
+                output = io.StringIO()
+                writer = csv.writer(output)
+                try:
+                    writer.writerow(result.keys())
+                    async for batch in result.partitions():
+                        writer.writerows(batch)
+                        yield output.getvalue()
+                        output.seek(0)
+                        output.truncate()
+                    if output.tell():
+                        yield output.getvalue()
+                except Exception:
+                    logger.exception("Failed while streaming log export", extra={"log_type": log_type.value})
+                    raise
+                finally:
+                    await session.close()
             
-            for log in logs:
-                writer.writerow(dict(log))
-                
-            return {
-                "data": output.getvalue(),
-                "content_type": "text/csv",
-                "filename": f"{log_type}_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            }
-        else:
-            return {
-                "data": [dict(log) for log in logs],
-                "content_type": "application/json",
-                "filename": f"{log_type}_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            }
+            return StreamingResponse(
+                csv_chunks(),
+                media_type="text/csv",
+                headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'}
+            )
+        
+        result = await db.execute(query, params)
+        logs = result.mappings().all()
+        
+        return {
+            "data": [dict(log) for log in logs],
+            "content_type": "application/json",
+            "filename": f"{filename}.json"
+        }
             
     except Exception as e:
+        logger.exception("Failed to export logs", extra={"log_type": log_type.value})
         raise HTTPException(
             status_code=500,
             detail=f"Failed to export logs: {str(e)}"
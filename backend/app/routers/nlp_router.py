@@ -3,19 +3,27 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text, bindparam
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
-import json
+import asyncio
+import logging
+import orjson
 import numpy as np
 from collections import defaultdict
 
-from ..db import get_db
+from ..db import get_db, AsyncSessionLocal
+from ..responses import ORJSONResponse
 from ..nlp_matching_glove import (
     glove_similarity,
     glove_comprehensive_similarity, 
+    glove_comprehensive_score_matrix,
     get_cached_glove_model,
     get_config_value
 )
 
-router = APIRouter(prefix="/allocation/nlp", tags=["allocation"])
+router = APIRouter(prefix="/allocation/nlp", tags=["allocation"], default_response_class=ORJSONResponse)
+logger = logging.getLogger(__name__)
+
+# Candidate jobs kept per student before the greedy pass
+TOP_K_PER_STUDENT = 20
 
 class NLPAllocationRequest(BaseModel):
     emails: Optional[List[str]] = Field(None, description="Limit allocation to these students (optional)")
@@ -31,6 +39,132 @@ class NLPAllocationResponse(BaseModel):
     students_matched: int = 0
     internships_matched: int = 0
 
+# Placements of every successful run; these are frozen for new runs
+_FROZEN_PLACEMENTS_STMT = text("""
+    SELECT mr.student_id, mr.internship_id
+    FROM match_result mr
+    JOIN alloc_run ar ON ar.run_id = mr.run_id
+    WHERE ar.status = 'SUCCESS'
+""")
+
+# Serializes the write phase of concurrent NLP runs (across workers); released at commit
+_NLP_WRITE_LOCK_KEY = 0x4E4C5041  # "NLPA"
+_NLP_WRITE_LOCK_STMT = text("SELECT pg_advisory_xact_lock(:key)")
+
+def _drop_conflicting_assignments(assigned, job_info, frozen_students, used_by_internship, respect_existing):
+    """
+    Re-apply the freeze against placements committed since scoring: drop students
+    frozen in the meantime and keep each internship within its remaining capacity
+    (best scores first). Returns a new {student_id: (internship_id, score, comp)}.
+    """
+    remaining = {
+        jid: info["capacity"] - used_by_internship.get(jid, 0)
+        for jid, info in job_info.items()
+    }
+    kept = {}
+    for sid, (jid, score, comp) in sorted(assigned.items(), key=lambda item: -item[1][1]):
+        if respect_existing and sid in frozen_students:
+            continue
+        if remaining.get(jid, 0) <= 0:
+            continue
+        kept[sid] = (jid, score, comp)
+        remaining[jid] -= 1
+    return kept
+
+# All matches of a run in one statement: the rows are sent as parallel arrays
+# and unnested server-side, so the insert is one round trip regardless of size
+_INSERT_MATCHES_STMT = text("""
+    INSERT INTO match_result
+      (run_id, student_id, internship_id, final_score, component_json)
+    SELECT :run_id, m.student_id, m.internship_id, m.final_score, m.component_json
+    FROM unnest(
+        CAST(:student_ids AS bigint[]),
+        CAST(:internship_ids AS bigint[]),
+        CAST(:final_scores AS numeric[]),
+        CAST(:component_jsons AS json[])
+    ) AS m(student_id, internship_id, final_score, component_json)
+""")
+
+def _greedy_pass(candidate_scores, si, ji, students, open_jobs, components, assigned, remaining):
+    """
+    Greedy assignment over the (si, ji) candidate pairs, best score first.
+    Skips already-assigned students and full jobs; updates assigned/remaining in place.
+    """
+    pair_scores = candidate_scores[si, ji]
+    keep = np.isfinite(pair_scores)
+    si, ji, pair_scores = si[keep], ji[keep], pair_scores[keep]
+
+    # Sort by score (descending)
+    for k in np.argsort(-pair_scores, kind="stable"):
+        sid = int(students[si[k]]["student_id"])
+        jid = open_jobs[ji[k]]
+        if sid in assigned:
+            continue
+        if remaining.get(jid, 0) <= 0:
+            continue
+        # Component breakdown for debugging/analysis
+        comp = {
+            "skill_score": round(float(components["skill_score"][si[k], ji[k]]), 4),
+            "location_score": round(float(components["location_score"][si[k], ji[k]]), 4),
+            "cgpa_score": round(float(components["cgpa_score"][si[k], ji[k]]), 4),
+            "weights": components["weights"]
+        }
+        assigned[sid] = (jid, float(pair_scores[k]), comp)
+        remaining[jid] -= 1
+
+def _score_and_assign(students, open_jobs, job_info, skill_weight, location_weight, cgpa_weight):
+    """
+    CPU-bound part of the NLP allocation: GloVe scoring and greedy assignment.
+    Pure function of the fetched rows, so it can run in a worker thread.
+    Returns: {student_id: (internship_id, score, component_dict)}
+    """
+    # Score all student-job pairs with NLP GloVe in one matrix pass
+    open_job_info = [job_info[jid] for jid in open_jobs]
+    scores, components = glove_comprehensive_score_matrix(
+        [s["skills_text"] or "" for s in students],
+        [j["req_skills_text"] for j in open_job_info],
+        [s["location_pref"] or "" for s in students],
+        [j["location"] or "" for j in open_job_info],
+        [float(s["cgpa"] or 0.0) for s in students],
+        [j["min_cgpa"] for j in open_job_info],
+        skill_weight,
+        location_weight,
+        cgpa_weight
+    )
+    
+    # Eligibility check (students without a CGPA are eligible everywhere)
+    student_cgpa = np.array([np.inf if s["cgpa"] is None else float(s["cgpa"]) for s in students])
+    job_min_cgpa = np.array([j["min_cgpa"] for j in open_job_info])
+    eligible = student_cgpa[:, None] >= job_min_cgpa[None, :]
+    
+    # Only consider scores above a minimum threshold
+    candidate_scores = np.where(eligible & (scores >= 0.2), scores, -np.inf)
+
+    # First pass: each student's top-K jobs only, so just S*K candidates are sorted
+    if len(open_jobs) > TOP_K_PER_STUDENT:
+        top_ji = np.argpartition(-candidate_scores, TOP_K_PER_STUDENT - 1, axis=1)[:, :TOP_K_PER_STUDENT]
+    else:
+        top_ji = np.broadcast_to(np.arange(len(open_jobs)), candidate_scores.shape)
+    top_si = np.broadcast_to(np.arange(len(students))[:, None], top_ji.shape)
+    
+    assigned = {}
+    remaining = {jid: job_info[jid]["remaining"] for jid in open_jobs}
+    _greedy_pass(candidate_scores, top_si, top_ji, students, open_jobs, components, assigned, remaining)
+    
+    # Second pass: students whose top-K jobs all filled up fall back to the rest
+    # of their scored jobs, so a viable lower-ranked job with capacity isn't lost
+    if len(open_jobs) > TOP_K_PER_STUDENT:
+        unassigned = np.array(
+            [si for si, s in enumerate(students) if int(s["student_id"]) not in assigned],
+            dtype=np.intp
+        )
+        if unassigned.size:
+            rest_ji = np.broadcast_to(np.arange(len(open_jobs)), (unassigned.size, len(open_jobs)))
+            rest_si = np.broadcast_to(unassigned[:, None], rest_ji.shape)
+            _greedy_pass(candidate_scores, rest_si, rest_ji, students, open_jobs, components, assigned, remaining)
+
+    return assigned
+
 async def run_nlp_allocation(
     db: AsyncSession,
     scope_emails: Optional[List[str]] = None,
@@ -43,7 +177,7 @@ async def run_nlp_allocation(
     Allocation using NLP-based GloVe matching:
       - If respect_existing=True: freeze last successful run's matches, reduce internship capacity.
       - If scope_emails provided: only consider those students for new allocation.
-    Returns: run_id
+    Returns: (run_id, match_count, students_matched, internships_matched)
     """
     # 1. Latest successful run
     latest_run_id = (await db.execute(text("""
@@ -57,12 +191,7 @@ async def run_nlp_allocation(
     frozen_students = set()
     used_by_internship = defaultdict(int)
 
-    rows = (await db.execute(text("""
-        SELECT mr.student_id, mr.internship_id
-        FROM match_result mr
-        JOIN alloc_run ar ON ar.run_id = mr.run_id
-        WHERE ar.status = 'SUCCESS'
-    """))).mappings().all()
+    rows = (await db.execute(_FROZEN_PLACEMENTS_STMT)).mappings().all()
 
     for r in rows:
         frozen_students.add(int(r["student_id"]))
@@ -74,6 +203,7 @@ async def run_nlp_allocation(
                i.req_skills_text, i.min_cgpa
         FROM internship i
         WHERE i.is_active = true
+          AND i.capacity > 0
     """))).mappings().all()
 
     job_info = {}
@@ -94,7 +224,11 @@ async def run_nlp_allocation(
         }
 
     # 4. Build WHERE conditions for students
-    where = ["1=1"]
+    # Hard CGPA constraint: skip students below every active internship's minimum,
+    # they can't be paired with anything (the per-pair check happens in step 7)
+    where = ["""(s.cgpa IS NULL OR s.cgpa >= (
+        SELECT COALESCE(MIN(COALESCE(i.min_cgpa, 0)), 0) FROM internship i WHERE i.is_active = true
+    ))"""]
     params = {}
 
     scope_emails = [e.strip() for e in (scope_emails or []) if e and e.strip()]
@@ -113,9 +247,10 @@ async def run_nlp_allocation(
             VALUES ('SUCCESS',
                     json_build_object('respect_existing', :re, 'scoped', 1, 'note','empty scope', 'algorithm', 'nlp_glove'),
                     NULL)
-        """), {"re": 1 if respect_existing else 0})).lastrowid
+            RETURNING run_id
+        """), {"re": 1 if respect_existing else 0})).scalar_one()
         await db.commit()
-        return int(rid)
+        return int(rid), 0, 0, 0
 
     # 5. Fetch eligible students
     sel = text(f"""
@@ -137,9 +272,10 @@ async def run_nlp_allocation(
             VALUES ('SUCCESS',
                     json_build_object('respect_existing', :re, 'scoped', :sc, 'algorithm', 'nlp_glove'),
                     json_build_object('note','no eligible students in scope'))
-        """), {"re": 1 if respect_existing else 0, "sc": 1 if bool(scope_emails) else 0})).lastrowid
+            RETURNING run_id
+        """), {"re": 1 if respect_existing else 0, "sc": 1 if bool(scope_emails) else 0})).scalar_one()
         await db.commit()
-        return int(rid)
+        return int(rid), 0, 0, 0
 
     # 6. Filter open jobs
     open_jobs = [jid for jid, info in job_info.items() if info["remaining"] > 0]
@@ -149,57 +285,28 @@ async def run_nlp_allocation(
             VALUES ('SUCCESS',
                     json_build_object('respect_existing', :re, 'scoped', :sc, 'algorithm', 'nlp_glove'),
                     json_build_object('note','no open capacity'))
-        """), {"re": 1 if respect_existing else 0, "sc": 1 if bool(scope_emails) else 0})).lastrowid
+            RETURNING run_id
+        """), {"re": 1 if respect_existing else 0, "sc": 1 if bool(scope_emails) else 0})).scalar_one()
         await db.commit()
-        return int(rid)
-
-    # 7. Score student-job pairs with NLP GloVe
-    pairs = []
-    for s in students:
-        for jid in open_jobs:
-            j = job_info[jid]
-            if j["remaining"] <= 0:
-                continue
-            
-            # Eligibility check
-            cg_ok = (s["cgpa"] is None) or (float(s["cgpa"]) >= j["min_cgpa"])
-            if not cg_ok:
-                continue
-            
-            # Calculate NLP-based comprehensive score
-            score, components = glove_comprehensive_similarity(
-                s["skills_text"] or "", 
-                j["req_skills_text"],
-                s["location_pref"] or "", 
-                j["location"] or "",
-                float(s["cgpa"] or 0.0), 
-                j["min_cgpa"],
-                skill_weight,
-                location_weight,
-                cgpa_weight
-            )
-            
-            # Only consider scores above a minimum threshold
-            if score >= 0.2:  # Minimum threshold
-                pairs.append((score, int(s["student_id"]), int(jid), components))
+        return int(rid), 0, 0, 0
 
-    # Sort by score (descending)
-    pairs.sort(reverse=True, key=lambda x: x[0])
-    
-    # 8. Greedy allocation
-    assigned = {}
-    remaining = {jid: job_info[jid]["remaining"] for jid in open_jobs}
+    # Release the connection back to the pool before the CPU-bound phase
+    await db.close()
 
-    for score, sid, jid, comp in pairs:
-        if sid in assigned:
-            continue
-        if remaining.get(jid, 0) <= 0:
-            continue
-        assigned[sid] = (jid, score, comp)
-        remaining[jid] -= 1
+    # 7-8. Score all student-job pairs with NLP GloVe and assign greedily,
+    # off the event loop (BLAS releases the GIL inside the thread)
+    assigned = await asyncio.to_thread(
+        _score_and_assign,
+        students,
+        open_jobs,
+        job_info,
+        skill_weight,
+        location_weight,
+        cgpa_weight
+    )
 
     # 9. Record run + matches
-    params_json = json.dumps({
+    params_json = orjson.dumps({
         'respect_existing': 1 if respect_existing else 0,
         'scoped': 1 if bool(scope_emails) else 0, 
         'frozen_count': len(frozen_students),
@@ -209,48 +316,63 @@ async def run_nlp_allocation(
             'cgpa': cgpa_weight
         },
         'algorithm': 'nlp_glove'
-    })
-    
-    metrics_json = json.dumps({
-        'total_students': len(students),
-        'total_jobs': len(open_jobs),
-        'matches_found': len(assigned),
-        'avg_score': sum(score for _, score, _ in assigned.values()) / len(assigned) if assigned else 0
-    })
+    }).decode()
     
-    result = await db.execute(text("""
-        INSERT INTO alloc_run (status, params_json, metrics_json)
-        VALUES ('SUCCESS', :params_json, :metrics_json)
-        RETURNING run_id
-    """), {
-        "params_json": params_json,
-        "metrics_json": metrics_json
-    })
+    # Fresh session (and pooled connection) for the writes
+    async with AsyncSessionLocal() as write_db:
+        # The frozen placements were read before scoring, in another transaction;
+        # lock out other NLP runs and re-check them against what is committed now
+        await write_db.execute(_NLP_WRITE_LOCK_STMT, {"key": _NLP_WRITE_LOCK_KEY})
+        
+        frozen_now = set()
+        used_now = defaultdict(int)
+        for r in (await write_db.execute(_FROZEN_PLACEMENTS_STMT)).mappings():
+            frozen_now.add(int(r["student_id"]))
+            used_now[int(r["internship_id"])] += 1
+        
+        assigned = _drop_conflicting_assignments(
+            assigned, job_info, frozen_now, used_now, respect_existing
+        )
+        
+        metrics_json = orjson.dumps({
+            'total_students': len(students),
+            'total_jobs': len(open_jobs),
+            'matches_found': len(assigned),
+            'avg_score': sum(score for _, score, _ in assigned.values()) / len(assigned) if assigned else 0
+        }).decode()
+        
+        result = await write_db.execute(text("""
+            INSERT INTO alloc_run (status, params_json, metrics_json)
+            VALUES ('SUCCESS', :params_json, :metrics_json)
+            RETURNING run_id
+        """), {
+            "params_json": params_json,
+            "metrics_json": metrics_json
+        })
     
-    rid = result.scalar_one()
+        rid = result.scalar_one()
     
-    if assigned:
-        rows = []
-        for sid, (jid, score, comp) in assigned.items():
-            rows.append({
+        if assigned:
+            student_ids, internship_ids, final_scores, component_jsons = [], [], [], []
+            for sid, (jid, score, comp) in assigned.items():
+                student_ids.append(sid)
+                internship_ids.append(jid)
+                final_scores.append(float(round(score, 4)))
+                component_jsons.append(orjson.dumps(comp).decode())
+        
+            await write_db.execute(_INSERT_MATCHES_STMT, {
                 "run_id": int(rid),
-                "student_id": sid,
-                "internship_id": jid,
-                "final_score": float(round(score, 4)),
-                "component_json": json.dumps(comp),
+                "student_ids": student_ids,
+                "internship_ids": internship_ids,
+                "final_scores": final_scores,
+                "component_jsons": component_jsons,
             })
-        
-        # Execute the inserts one by one to avoid issues with bulk insert
-        for row in rows:
-            await db.execute(text("""
-                INSERT INTO match_result
-                  (run_id, student_id, internship_id, final_score, component_json)
-                VALUES
-                  (:run_id, :student_id, :internship_id, :final_score, :component_json)
-            """), row)
-
-    await db.commit()
-    return int(rid)
+
+        await write_db.commit()
+
+    # Each student is assigned at most once, so the stats follow from `assigned`
+    internships_matched = len({jid for jid, _, _ in assigned.values()})
+    return int(rid), len(assigned), len(assigned), internships_matched
 
 @router.post("/run", response_model=NLPAllocationResponse)
 async def run_allocation(
@@ -261,7 +383,7 @@ async def run_allocation(
     Trigger a new NLP-based allocation run with optional configuration parameters
     """
     try:
-        run_id = await run_nlp_allocation(
+        run_id, match_count, students_matched, internships_matched = await run_nlp_allocation(
             db=db,
             scope_emails=request.emails,
             respect_existing=request.respect_existing,
@@ -270,32 +392,16 @@ async def run_allocation(
             cgpa_weight=request.cgpa_weight
         )
         
-        # Get summary stats
-        query = text("""
-            SELECT 
-                COUNT(*) as match_count,
-                COUNT(DISTINCT student_id) as students_matched,
-                COUNT(DISTINCT internship_id) as internships_matched
-            FROM match_result
-            WHERE run_id = :run_id
-        """)
-        
-        result = await db.execute(query, {"run_id": run_id})
-        stats = result.mappings().first()
-        
         return {
             "run_id": run_id,
             "message": "NLP-based allocation completed successfully",
-            "match_count": stats["match_count"] if stats else 0,
-            "students_matched": stats["students_matched"] if stats else 0,
-            "internships_matched": stats["internships_matched"] if stats else 0
+            "match_count": match_count,
+            "students_matched": students_matched,
+            "internships_matched": internships_matched
         }
         
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"NLP Allocation error: {str(e)}")
-        print(error_details)
+        logger.exception("NLP allocation failed")
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -5,52 +5,36 @@ from pydantic import BaseModel
 from typing import Optional
 from app.db import get_db
 from datetime import datetime
+import logging
 
 router = APIRouter(prefix="/preferences", tags=["preferences"])
+logger = logging.getLogger(__name__)
 
 class PreferenceCreate(BaseModel):
     student_id: int
     internship_id: int
     ranked: Optional[int] = None  # Optional ranking (1, 2, 3, etc.)
 
+# Single round trip: the rank defaults to the student's next free rank, and the
+# unique (student_id, internship_id) key turns a repeat add into a no-op
+_ADD_PREFERENCE_STMT = text("""
+    INSERT INTO preference (student_id, internship_id, ranked, created_at)
+    SELECT :student_id, :internship_id,
+           COALESCE(
+               CAST(:ranked AS integer),
+               (SELECT COALESCE(MAX(ranked), 0) + 1 FROM preference WHERE student_id = :student_id)
+           ),
+           :created_at
+    ON CONFLICT (student_id, internship_id) DO NOTHING
+    RETURNING ranked
+""")
+
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def add_preference(preference: PreferenceCreate, db: AsyncSession = Depends(get_db)):
     """Add an internship to a student's preferences"""
     try:
-        # Check if the preference already exists
-        check_result = await db.execute(
-            text("""
-                SELECT 1 FROM preference 
-                WHERE student_id = :student_id AND internship_id = :internship_id
-            """),
-            {"student_id": preference.student_id, "internship_id": preference.internship_id}
-        )
-        
-        if check_result.scalar_one_or_none():
-            # Preference already exists, return success but with a message
-            return {
-                "success": True,
-                "message": "Preference already exists"
-            }
-        
-        # Get the next rank for this student if not provided
-        if preference.ranked is None:
-            rank_result = await db.execute(
-                text("""
-                    SELECT COALESCE(MAX(ranked), 0) + 1 FROM preference
-                    WHERE student_id = :student_id
-                """),
-                {"student_id": preference.student_id}
-            )
-            next_rank = rank_result.scalar_one()
-            preference.ranked = next_rank
-        
-        # Insert the new preference
-        await db.execute(
-            text("""
-                INSERT INTO preference (student_id, internship_id, ranked, created_at)
-                VALUES (:student_id, :internship_id, :ranked, :created_at)
-            """),
+        result = await db.execute(
+            _ADD_PREFERENCE_STMT,
             {
                 "student_id": preference.student_id,
                 "internship_id": preference.internship_id,
@@ -58,17 +42,24 @@ async def add_preference(preference: PreferenceCreate, db: AsyncSession = Depend
                 "created_at": datetime.now()
             }
         )
-        
+        ranked = result.scalar_one_or_none()
         await db.commit()
         
+        if ranked is None:
+            # Preference already exists, return success but with a message
+            return {
+                "success": True,
+                "message": "Preference already exists"
+            }
+        
         return {
             "success": True,
             "message": "Preference added successfully",
-            "ranked": preference.ranked
+            "ranked": ranked
         }
     except Exception as e:
         await db.rollback()
-        print(f"Error adding preference: {str(e)}")
+        logger.exception("Failed to add preference for student_id=%s", preference.student_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to add preference: {str(e)}"
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
 from pydantic import BaseModel
 from typing import List, Optional
-from app.db import get_db
+from decimal import Decimal
+from functools import lru_cache
+import asyncio
+import logging
+import time
+from app.db import get_db, AsyncSessionLocal, AsyncSessionLocalRO
+from app.responses import ORJSONResponse, NDJSONResponse
 
-router = APIRouter(prefix="/search", tags=["search"])
+router = APIRouter(prefix="/search", tags=["search"], default_response_class=ORJSONResponse)
+logger = logging.getLogger(__name__)
 
 # Response models
 class InternshipResult(BaseModel):
@@ -22,215 +30,396 @@ class InternshipResult(BaseModel):
     required_skills: List[str] = []
     match_score: Optional[float] = None
 
-@router.get("/matches/{student_id}", response_model=List[InternshipResult])
+class MatchCursor(BaseModel):
+    cursor_score: Decimal
+    cursor_id: int
+
+class MatchedInternshipPage(BaseModel):
+    items: List[InternshipResult]
+    next: Optional[MatchCursor] = None
+
+class InternshipCursor(BaseModel):
+    # Null once the page has moved past the matched internships
+    cursor_score: Optional[Decimal] = None
+    cursor_id: int
+
+class InternshipPage(BaseModel):
+    items: List[InternshipResult]
+    next: Optional[InternshipCursor] = None
+
+def _like_pattern(value: str, exact_prefix: bool = False) -> str:
+    """
+    LIKE pattern for a filter value: 'value%' in prefix mode (served by the
+    lower(col) text_pattern_ops indexes), otherwise '%value%' (trigram indexes)
+    """
+    if exact_prefix and "%" not in value:
+        return f"{value}%"
+    return f"%{value}%"
+
+_INTERNSHIP_COLUMNS = """
+    i.internship_id,
+    i.title,
+    i.org_name,
+    i.description,
+    i.location,
+    i.min_cgpa::float8 AS min_cgpa,
+    i.wage_min,
+    i.wage_max,
+    i.capacity,
+    i.is_shift_night::boolean AS is_shift_night,
+    -- Comma-separated skills split and trimmed server-side; arrives as a list
+    COALESCE(string_to_array(
+        btrim(regexp_replace(i.req_skills_text, '\\s*,\\s*', ',', 'g'), E' \\t\\r\\n'), ','
+    ), '{}') AS required_skills
+"""
+
+_MATCHES_SELECT = f"""
+    SELECT {_INTERNSHIP_COLUMNS},
+        mr.final_score * 10 as match_score
+    FROM match_result mr
+    JOIN internship i ON i.internship_id = mr.internship_id
+    WHERE mr.student_id = :student_id
+"""
+_MATCHES_ORDER = " ORDER BY mr.final_score DESC, mr.internship_id DESC LIMIT :limit"
+
+# Rows are streamed to the client as-is, so they carry the full InternshipResult shape
+_NON_MATCHES_SELECT = f"""
+    SELECT {_INTERNSHIP_COLUMNS},
+        NULL AS match_score
+    FROM internship i
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM match_result mr
+        WHERE mr.student_id = :student_id
+          AND mr.internship_id = i.internship_id
+    )
+    AND i.is_active = true
+"""
+_NON_MATCHES_ORDER = " ORDER BY i.created_at DESC"
+
+# Matched and unmatched internships in one pass: best match score per internship
+# (NULL when unmatched), matched rows first. Matched internships are kept even
+# if inactive, like /matches; unmatched ones must be active, like /non-matches.
+_INTERNSHIPS_SELECT = f"""
+    SELECT {_INTERNSHIP_COLUMNS},
+        mr.final_score * 10 as match_score
+    FROM internship i
+    LEFT JOIN LATERAL (
+        SELECT m.final_score
+        FROM match_result m
+        WHERE m.student_id = :student_id
+          AND m.internship_id = i.internship_id
+        ORDER BY m.final_score DESC
+        LIMIT 1
+    ) mr ON true
+    WHERE (i.is_active = true OR mr.final_score IS NOT NULL)
+"""
+_INTERNSHIPS_ORDER = " ORDER BY mr.final_score DESC NULLS LAST, i.internship_id DESC LIMIT :limit"
+
+# WHERE clause for each optional bind parameter, in query order
+# Case-insensitive; lower(col) matches the functional indexes in models.py
+_SEARCH_FILTERS = (
+    ("location", "lower(i.location) LIKE lower(:location)"),
+    ("company", "lower(i.org_name) LIKE lower(:company)"),
+    (
+        "search",
+        "(lower(i.title) LIKE lower(:search) OR lower(i.org_name) LIKE lower(:search)"
+        " OR lower(i.description) LIKE lower(:search))",
+    ),
+    ("skill", "lower(i.req_skills_text) LIKE lower(:skill)"),
+)
+
+# Keyset pagination: continue strictly after the last row of the previous page
+_MATCHES_FILTERS = _SEARCH_FILTERS + (
+    ("cursor_score", "(mr.final_score, mr.internship_id) < (:cursor_score, :cursor_id)"),
+)
+# Matched rows (by score) come before unmatched ones (match_score NULL); a cursor
+# on a matched row also lets every unmatched row through, one on an unmatched
+# row (after_id) only continues among the unmatched
+_INTERNSHIPS_FILTERS = _SEARCH_FILTERS + (
+    (
+        "cursor_score",
+        "((mr.final_score, i.internship_id) < (:cursor_score, :cursor_id)"
+        " OR mr.final_score IS NULL)",
+    ),
+    ("after_id", "(mr.final_score IS NULL AND i.internship_id < :after_id)"),
+)
+
+@lru_cache(maxsize=128)
+def _search_query(
+    select: str, param_names: frozenset, order_by: str, filters: tuple = _SEARCH_FILTERS
+) -> TextClause:
+    """Search SELECT with the active filters, built once per filter combination"""
+    query = select
+    for name, clause in filters:
+        if name in param_names:
+            query += f" AND {clause}"
+    return text(query + order_by)
+
+@router.get("/matches/{student_id}", response_model=MatchedInternshipPage)
 async def get_matched_internships(
     student_id: int, 
+    limit: int = Query(20, ge=1, le=500),
+    cursor_score: Optional[Decimal] = None,
+    cursor_id: Optional[int] = None,
     location: Optional[str] = None,
     company: Optional[str] = None,
     skill: Optional[str] = None,
     search: Optional[str] = None,
+    exact_prefix: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get internships that have match scores for a student"""
+    """Get a page of internships that have match scores for a student, best first.
+
+    Pass the ``next`` values from the previous page as ``cursor_score`` and
+    ``cursor_id`` to fetch the following page; both are required together.
+    """
+    if (cursor_score is None) != (cursor_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="cursor_score and cursor_id must be given together"
+        )
+    
     try:
-        query = """
-            SELECT 
-                i.internship_id,
-                i.title,
-                i.org_name,
-                i.description,
-                i.location,
-                i.min_cgpa,
-                i.wage_min,
-                i.wage_max,
-                i.capacity,
-                i.is_shift_night,
-                i.req_skills_text,
-                mr.final_score * 10 as match_score
-            FROM match_result mr
-            JOIN internship i ON i.internship_id = mr.internship_id
-            WHERE mr.student_id = :student_id
-        """
-        
         # Add filters
-        params = {"student_id": student_id}
+        params = {"student_id": student_id, "limit": limit}
         
         if location:
-            query += " AND i.location LIKE :location"
-            params["location"] = f"%{location}%"
+            params["location"] = _like_pattern(location, exact_prefix)
             
         if company:
-            query += " AND i.org_name LIKE :company"
-            params["company"] = f"%{company}%"
+            params["company"] = _like_pattern(company, exact_prefix)
             
         if search:
-            query += " AND (i.title LIKE :search OR i.org_name LIKE :search OR i.description LIKE :search)"
             params["search"] = f"%{search}%"
             
         if skill:
-            query += " AND i.req_skills_text LIKE :skill"
             params["skill"] = f"%{skill}%"
             
-        query += " ORDER BY mr.final_score DESC"
-        
-        result = await db.execute(text(query), params)
+        if cursor_score is not None:
+            params["cursor_score"] = cursor_score
+            params["cursor_id"] = cursor_id
+            
+        query = _search_query(_MATCHES_SELECT, frozenset(params), _MATCHES_ORDER, _MATCHES_FILTERS)
+        result = await db.execute(query, params)
         matches = result.mappings().all()
         
-        if not matches:
-            return []
-            
-        return [
-            {
-                "internship_id": match["internship_id"],
-                "title": match["title"],
-                "org_name": match["org_name"],
-                "description": match["description"],
-                "location": match["location"],
-                "min_cgpa": float(match["min_cgpa"]) if match["min_cgpa"] else None,
-                "wage_min": match["wage_min"],
-                "wage_max": match["wage_max"],
-                "capacity": match["capacity"],
-                "is_shift_night": match["is_shift_night"],
-                # Parse skills from the text field - split by commas and trim whitespace
-                "required_skills": [s.strip() for s in match["req_skills_text"].split(",")] 
-                                  if match["req_skills_text"] else [],
-                "match_score": match["match_score"]
-            } for match in matches
-        ]
+        next_cursor = None
+        if len(matches) == limit:
+            next_cursor = {
+                # match_score is final_score * 10 (exact NUMERIC arithmetic)
+                "cursor_score": matches[-1]["match_score"] / 10,
+                "cursor_id": matches[-1]["internship_id"]
+            }
+        
+        # Rows already have the InternshipResult shape (see _INTERNSHIP_COLUMNS), so
+        # they go straight to orjson without a response-model validation pass
+        return ORJSONResponse({"items": matches, "next": next_cursor})
     except Exception as e:
-        print(f"Error getting matched internships: {str(e)}")
+        logger.exception("Failed to get matched internships", extra={"student_id": student_id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get matched internships: {str(e)}"
         )
 
-@router.get("/non-matches/{student_id}", response_model=List[InternshipResult])
+@router.get("/non-matches/{student_id}", response_class=NDJSONResponse)
 async def get_non_matched_internships(
     student_id: int, 
     location: Optional[str] = None,
     company: Optional[str] = None,
     skill: Optional[str] = None,
     search: Optional[str] = None,
+    exact_prefix: bool = False
+):
+    """
+    Get internships that don't have match scores for a student.
+    Rows (InternshipResult objects) are streamed as NDJSON while the
+    server-side cursor is read.
+    """
+    # Add filters
+    params = {"student_id": student_id}
+    
+    if location:
+        params["location"] = _like_pattern(location, exact_prefix)
+        
+    if company:
+        params["company"] = _like_pattern(company, exact_prefix)
+        
+    if search:
+        params["search"] = f"%{search}%"
+        
+    if skill:
+        params["skill"] = f"%{skill}%"
+        
+    query = _search_query(_NON_MATCHES_SELECT, frozenset(params), _NON_MATCHES_ORDER)
+    
+    # The query is started before the response so that a failure here is still a 500
+    session = AsyncSessionLocalRO()
+    try:
+        result = await session.stream(query, params)
+    except Exception as e:
+        await session.close()
+        logger.exception("Failed to get non-matched internships", extra={"student_id": student_id})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get non-matched internships: {str(e)}"
+        )
+    
+    async def rows():
+        # The session stays open until the last row is sent, independent of when
+        # request dependencies are closed; errors past this point end the stream
+        try:
+            async for row in result.mappings():
+                yield row
+        except Exception:
+            logger.exception("Failed while streaming non-matched internships", extra={"student_id": student_id})
+            raise
+        finally:
+            await session.close()
+    
+    return NDJSONResponse(rows())
+
+@router.get("/internships/{student_id}", response_model=InternshipPage)
+async def get_internships_for_student(
+    student_id: int, 
+    limit: int = Query(100, ge=1, le=1000),
+    cursor_score: Optional[Decimal] = None,
+    cursor_id: Optional[int] = None,
+    location: Optional[str] = None,
+    company: Optional[str] = None,
+    skill: Optional[str] = None,
+    search: Optional[str] = None,
+    exact_prefix: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get internships that don't have match scores for a student"""
+    """
+    Get a page of matched and non-matched internships for a student in one query.
+    Matched ones come first by score; match_score is null for the rest.
+
+    Pass the ``next`` values from the previous page as ``cursor_score`` and
+    ``cursor_id`` to fetch the following page (``cursor_score`` is null once
+    the matched internships are exhausted).
+    """
+    if cursor_score is not None and cursor_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="cursor_score requires cursor_id"
+        )
+    
     try:
-        query = """
-            SELECT 
-                i.internship_id,
-                i.title,
-                i.org_name,
-                i.description,
-                i.location,
-                i.min_cgpa,
-                i.wage_min,
-                i.wage_max,
-                i.capacity,
-                i.is_shift_night,
-                i.req_skills_text
-            FROM internship i
-            WHERE i.internship_id NOT IN (
-                SELECT mr.internship_id 
-                FROM match_result mr 
-                WHERE mr.student_id = :student_id
-            )
-            AND i.is_active = true
-        """
-        
         # Add filters
-        params = {"student_id": student_id}
+        params = {"student_id": student_id, "limit": limit}
         
         if location:
-            query += " AND i.location LIKE :location"
-            params["location"] = f"%{location}%"
+            params["location"] = _like_pattern(location, exact_prefix)
             
         if company:
-            query += " AND i.org_name LIKE :company"
-            params["company"] = f"%{company}%"
+            params["company"] = _like_pattern(company, exact_prefix)
             
         if search:
-            query += " AND (i.title LIKE :search OR i.org_name LIKE :search OR i.description LIKE :search)"
             params["search"] = f"%{search}%"
             
         if skill:
-            query += " AND i.req_skills_text LIKE :skill"
             params["skill"] = f"%{skill}%"
             
-        query += " ORDER BY i.created_at DESC"
+        if cursor_score is not None:
+            params["cursor_score"] = cursor_score
+            params["cursor_id"] = cursor_id
+        elif cursor_id is not None:
+            params["after_id"] = cursor_id
+            
+        query = _search_query(
+            _INTERNSHIPS_SELECT, frozenset(params), _INTERNSHIPS_ORDER, _INTERNSHIPS_FILTERS
+        )
+        result = await db.execute(query, params)
+        internships = result.mappings().all()
         
-        result = await db.execute(text(query), params)
-        non_matches = result.mappings().all()
+        next_cursor = None
+        if len(internships) == limit:
+            last = internships[-1]
+            next_cursor = {
+                # match_score is final_score * 10 (exact NUMERIC arithmetic)
+                "cursor_score": last["match_score"] / 10 if last["match_score"] is not None else None,
+                "cursor_id": last["internship_id"]
+            }
         
-        if not non_matches:
-            return []
-            
-        return [
-            {
-                "internship_id": item["internship_id"],
-                "title": item["title"],
-                "org_name": item["org_name"],
-                "description": item["description"],
-                "location": item["location"],
-                "min_cgpa": float(item["min_cgpa"]) if item["min_cgpa"] else None,
-                "wage_min": item["wage_min"],
-                "wage_max": item["wage_max"],
-                "capacity": item["capacity"],
-                "is_shift_night": item["is_shift_night"],
-                # Parse skills from the text field
-                "required_skills": [s.strip() for s in item["req_skills_text"].split(",")]
-                                  if item["req_skills_text"] else [],
-                "match_score": None  # No match score for non-matches
-            } for item in non_matches
-        ]
+        # Rows already have the InternshipResult shape; skip re-validation
+        return ORJSONResponse({"items": internships, "next": next_cursor})
     except Exception as e:
-        print(f"Error getting non-matched internships: {str(e)}")
+        logger.exception("Failed to get internships", extra={"student_id": student_id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to get non-matched internships: {str(e)}"
+            detail=f"Failed to get internships: {str(e)}"
         )
 
-@router.get("/filters", response_model=dict)
-async def get_filter_options(db: AsyncSession = Depends(get_db)):
-    """Get all filter options for internship search"""
-    try:
-        # Get unique locations
-        location_result = await db.execute(text("""
-            SELECT DISTINCT location FROM internship 
-            WHERE location IS NOT NULL AND location <> ''
-        """))
-        locations = [row[0] for row in location_result]
-        
-        # Get unique companies
-        company_result = await db.execute(text("""
-            SELECT DISTINCT org_name FROM internship 
-            WHERE org_name IS NOT NULL AND org_name <> ''
-        """))
-        companies = [row[0] for row in company_result]
-        
-        # Extract skills from req_skills_text
-        skill_result = await db.execute(text("""
-            SELECT DISTINCT regexp_split_to_table(req_skills_text, ',') AS skill
-            FROM internship
-            WHERE req_skills_text IS NOT NULL AND req_skills_text <> ''
-        """))
-        
-        # Process and clean up skills
-        skills_raw = [row[0] for row in skill_result]
-        skills = []
-        for skill in skills_raw:
-            skill = skill.strip()
-            if skill and skill not in skills:
-                skills.append(skill)
+# Filter values come from the internship_filter_options materialized view
+# (see models.py), one row per distinct (kind, value)
+_FILTER_OPTIONS_STMT = text("""
+    SELECT kind, value FROM internship_filter_options ORDER BY kind, value
+""")
+
+_REFRESH_FILTER_OPTIONS_STMT = text("""
+    REFRESH MATERIALIZED VIEW CONCURRENTLY internship_filter_options
+""")
+
+# Per-process cache of the /filters payload. The options only change when
+# internships are posted, so a short TTL bounds staleness across workers and
+# refresh_filter_options() clears it in the worker that handled the insert.
+_FILTER_OPTIONS_TTL_SECONDS = 60
+_filter_options_cache: Optional[dict] = None
+_filter_options_expires_at = 0.0
+_filter_options_lock = asyncio.Lock()
+
+def clear_filter_options_cache():
+    """Drop the cached filter options so the next request reads the view"""
+    global _filter_options_cache
+    _filter_options_cache = None
+
+async def _load_filter_options() -> dict:
+    """Filter options from the view, cached for _FILTER_OPTIONS_TTL_SECONDS"""
+    global _filter_options_cache, _filter_options_expires_at
+    
+    if _filter_options_cache is not None and time.monotonic() < _filter_options_expires_at:
+        return _filter_options_cache
+    
+    # Concurrent misses wait here and reuse the first request's result
+    async with _filter_options_lock:
+        if _filter_options_cache is not None and time.monotonic() < _filter_options_expires_at:
+            return _filter_options_cache
         
-        skills.sort()  # Sort alphabetically
+        async with AsyncSessionLocalRO() as session:
+            result = await session.execute(_FILTER_OPTIONS_STMT)
+            
+            options = {"location": [], "company": [], "skill": []}
+            for kind, value in result:
+                options[kind].append(value)
         
-        return {
-            "locations": locations,
-            "companies": companies,
-            "skills": skills
+        _filter_options_cache = {
+            "locations": options["location"],
+            "companies": options["company"],
+            "skills": options["skill"]
         }
+        _filter_options_expires_at = time.monotonic() + _FILTER_OPTIONS_TTL_SECONDS
+        return _filter_options_cache
+
+async def refresh_filter_options():
+    """Rebuild the filter options view; run after internships are created"""
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(_REFRESH_FILTER_OPTIONS_STMT)
+            await session.commit()
+    except Exception:
+        logger.exception("Failed to refresh filter options")
+    finally:
+        clear_filter_options_cache()
+
+@router.get("/filters", response_model=dict)
+async def get_filter_options():
+    """Get all filter options for internship search"""
+    try:
+        return await _load_filter_options()
     except Exception as e:
-        print(f"Error getting filter options: {str(e)}")
+        logger.exception("Failed to get filter options")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get filter options: {str(e)}"
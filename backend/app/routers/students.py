@@ -1,14 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
+from sqlalchemy.dialects.postgresql import JSONB
 from pydantic import BaseModel
-from typing import Optional, List, Union, Any
+from typing import Optional, List, Union
 from decimal import Decimal
 from app.db import get_db
-from datetime import datetime
-import json
+from app.responses import ORJSONResponse
+import logging
+import orjson
 
-router = APIRouter(prefix="/students", tags=["students"])
+router = APIRouter(prefix="/students", tags=["students"], default_response_class=ORJSONResponse)
+logger = logging.getLogger(__name__)
 
 class StudentProfile(BaseModel):
     student_id: int
@@ -18,7 +21,7 @@ class StudentProfile(BaseModel):
     highest_qualification: Optional[str] = None
     ext_id: Optional[str] = None
     degree: Optional[str] = None
-    # Update types to match what DB returns
+    # Read back as float (cast in SQL); str/Decimal still accepted on update
     cgpa: Optional[Union[str, Decimal, float]] = None
     grad_year: Optional[int] = None
     tenth_percent: Optional[Union[str, Decimal, float]] = None
@@ -28,11 +31,13 @@ class StudentProfile(BaseModel):
     willing_radius_km: Optional[int] = None
     category_code: Optional[str] = None
     disability_code: Optional[str] = None
-    # This could be a string or a parsed list/dict
-    languages_json: Optional[Any] = None
+    # List/dict; a JSON-encoded string is also accepted on update
+    languages_json: Optional[Union[list, dict, str]] = None
     skills_text: Optional[str] = None
     resume_url: Optional[str] = None
     resume_summary: Optional[str] = None
+    # Internships that shortlisted this student (read-only; ignored on update)
+    shortlisted_for: List[int] = []
 
 @router.get("/{student_id}", response_model=StudentProfile)
 async def get_student_profile(student_id: int, db: AsyncSession = Depends(get_db)):
@@ -41,18 +46,19 @@ async def get_student_profile(student_id: int, db: AsyncSession = Depends(get_db
         result = await db.execute(
             text("""
                 SELECT 
-                    student_id, name, email, phone, highest_qualification, 
-                    ext_id, degree, cgpa, grad_year, tenth_percent,
-                    twelfth_percent, location_pref, pincode, willing_radius_km,
-                    category_code, disability_code, languages_json, skills_text,
-                    resume_url, resume_summary,
-                    COALESCE(
-                        (SELECT array_agg(internship_id) 
-                        FROM shortlisted_candidates 
-                        WHERE student_id = s.student_id
-                    ), '{}'::int[]) as shortlisted_for
+                    s.student_id, s.name, s.email, s.phone, s.highest_qualification, 
+                    s.ext_id, s.degree, s.cgpa::float8 AS cgpa, s.grad_year,
+                    s.tenth_percent::float8 AS tenth_percent,
+                    s.twelfth_percent::float8 AS twelfth_percent,
+                    s.location_pref, s.pincode, s.willing_radius_km,
+                    s.category_code, s.disability_code, s.languages_json, s.skills_text,
+                    s.resume_url, s.resume_summary,
+                    -- One aggregate over the joined shortlist rows; {} when there are none
+                    array_remove(array_agg(sc.internship_id), NULL) as shortlisted_for
                 FROM student s
-                WHERE student_id = :student_id
+                LEFT JOIN shortlisted_candidates sc ON sc.student_id = s.student_id
+                WHERE s.student_id = :student_id
+                GROUP BY s.student_id
             """),
             {"student_id": student_id}
         )
@@ -65,35 +71,13 @@ async def get_student_profile(student_id: int, db: AsyncSession = Depends(get_db
                 detail=f"Student with id {student_id} not found"
             )
             
-        # Handle languages_json: ensure it's a string for the response
-        languages = student["languages_json"]
-        if languages and not isinstance(languages, str):
-            try:
-                # If it's already parsed as a list or dict, convert to JSON string
-                languages = json.dumps(languages)
-            except:
-                # Fallback
-                languages = str(languages)
-        
-        # Create a copy of student data to modify
-        student_data = dict(student)
-        student_data["languages_json"] = languages
-        
-        # Convert decimal values to strings if necessary
-        for field in ["cgpa", "tenth_percent", "twelfth_percent"]:
-            if student_data[field] and isinstance(student_data[field], Decimal):
-                student_data[field] = str(student_data[field])
-        
-        # Convert willing_radius_km to string if it's an int
-        if student_data["willing_radius_km"] and isinstance(student_data["willing_radius_km"], int):
-            student_data["willing_radius_km"] = str(student_data["willing_radius_km"])
-            
-        return student_data
+        # languages_json (jsonb) arrives already decoded as a list/dict
+        return student
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error getting student profile: {str(e)}")
+        logger.exception("Failed to get student profile", extra={"student_id": student_id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get student profile: {str(e)}"
@@ -103,18 +87,6 @@ async def get_student_profile(student_id: int, db: AsyncSession = Depends(get_db
 async def update_student_profile(profile: StudentProfile, db: AsyncSession = Depends(get_db)):
     """Update a student's profile information"""
     try:
-        # Check if student exists
-        check_result = await db.execute(
-            text("SELECT 1 FROM student WHERE student_id = :student_id"),
-            {"student_id": profile.student_id}
-        )
-        
-        if not check_result.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Student with id {profile.student_id} not found"
-            )
-            
         # Convert willing_radius_km to integer if needed
         willing_radius_km = profile.willing_radius_km
         if willing_radius_km is not None and isinstance(willing_radius_km, str):
@@ -123,76 +95,75 @@ async def update_student_profile(profile: StudentProfile, db: AsyncSession = Dep
             except ValueError:
                 willing_radius_km = 20  # Default value if conversion fails
         
-        # Process languages_json for database storage
+        # languages_json is bound as JSONB, so lists/dicts go to the driver as-is;
+        # a JSON string (older clients) is parsed once here
         languages_json = profile.languages_json
-        
-        # Convert languages to JSON string if it's not already
-        if languages_json is not None:
-            if isinstance(languages_json, (list, dict)):
-                # Convert Python object to JSON string
-                languages_json = json.dumps(languages_json)
-            elif isinstance(languages_json, str):
-                # Ensure the string is valid JSON by parsing and re-encoding it
-                try:
-                    parsed = json.loads(languages_json)
-                    languages_json = json.dumps(parsed)
-                except json.JSONDecodeError:
-                    # If the string isn't valid JSON, wrap it as a JSON string array
-                    languages_json = json.dumps([languages_json])
+        if isinstance(languages_json, str):
+            try:
+                languages_json = orjson.loads(languages_json)
+            except orjson.JSONDecodeError:
+                # If the string isn't valid JSON, wrap it as a JSON string array
+                languages_json = [languages_json]
                 
-        # Update the student record
-        await db.execute(
-            text("""
-                UPDATE student
-                SET 
-                    name = :name,
-                    email = :email,
-                    phone = :phone,
-                    highest_qualification = :highest_qualification,
-                    ext_id = :ext_id,
-                    degree = :degree,
-                    cgpa = :cgpa,
-                    grad_year = :grad_year,
-                    tenth_percent = :tenth_percent,
-                    twelfth_percent = :twelfth_percent,
-                    location_pref = :location_pref,
-                    pincode = :pincode,
-                    willing_radius_km = :willing_radius_km,
-                    category_code = :category_code,
-                    disability_code = :disability_code,
-                    languages_json = :languages_json,
-                    skills_text = :skills_text,
-                    resume_url = :resume_url,
-                    resume_summary = :resume_summary,
-                    updated_at = :updated_at
-                WHERE student_id = :student_id
-            """),
-            {
-                "student_id": profile.student_id,
-                "name": profile.name,
-                "email": profile.email,
-                "phone": profile.phone,
-                "highest_qualification": profile.highest_qualification,
-                "ext_id": profile.ext_id,
-                "degree": profile.degree,
-                "cgpa": profile.cgpa,
-                "grad_year": profile.grad_year,
-                "tenth_percent": profile.tenth_percent,
-                "twelfth_percent": profile.twelfth_percent,
-                "location_pref": profile.location_pref,
-                "pincode": profile.pincode,
-                "willing_radius_km": willing_radius_km,
-                "category_code": profile.category_code,
-                "disability_code": profile.disability_code,
-                "languages_json": languages_json,  # Now properly formatted as a JSON string
-                "skills_text": profile.skills_text,
-                "resume_url": profile.resume_url,
-                "resume_summary": profile.resume_summary,
-                "updated_at": datetime.now()
-            }
-        )
-        
-        await db.commit()
+        # One transaction: rolled back if the student is missing, committed otherwise
+        async with db.begin():
+            # Update the student record; RETURNING tells us whether it exists
+            result = await db.execute(
+                text("""
+                    UPDATE student
+                    SET 
+                        name = :name,
+                        email = :email,
+                        phone = :phone,
+                        highest_qualification = :highest_qualification,
+                        ext_id = :ext_id,
+                        degree = :degree,
+                        cgpa = :cgpa,
+                        grad_year = :grad_year,
+                        tenth_percent = :tenth_percent,
+                        twelfth_percent = :twelfth_percent,
+                        location_pref = :location_pref,
+                        pincode = :pincode,
+                        willing_radius_km = :willing_radius_km,
+                        category_code = :category_code,
+                        disability_code = :disability_code,
+                        languages_json = :languages_json,
+                        skills_text = :skills_text,
+                        resume_url = :resume_url,
+                        resume_summary = :resume_summary,
+                        updated_at = NOW()
+                    WHERE student_id = :student_id
+                    RETURNING student_id
+                """).bindparams(bindparam("languages_json", type_=JSONB)),
+                {
+                    "student_id": profile.student_id,
+                    "name": profile.name,
+                    "email": profile.email,
+                    "phone": profile.phone,
+                    "highest_qualification": profile.highest_qualification,
+                    "ext_id": profile.ext_id,
+                    "degree": profile.degree,
+                    "cgpa": profile.cgpa,
+                    "grad_year": profile.grad_year,
+                    "tenth_percent": profile.tenth_percent,
+                    "twelfth_percent": profile.twelfth_percent,
+                    "location_pref": profile.location_pref,
+                    "pincode": profile.pincode,
+                    "willing_radius_km": willing_radius_km,
+                    "category_code": profile.category_code,
+                    "disability_code": profile.disability_code,
+                    "languages_json": languages_json,
+                    "skills_text": profile.skills_text,
+                    "resume_url": profile.resume_url,
+                    "resume_summary": profile.resume_summary
+                }
+            )
+            
+            if result.first() is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Student with id {profile.student_id} not found"
+                )
         
         return {
             "success": True,
@@ -203,7 +174,7 @@ async def update_student_profile(profile: StudentProfile, db: AsyncSession = Dep
         raise
     except Exception as e:
         await db.rollback()
-        print(f"Error updating student profile: {str(e)}")
+        logger.exception("Failed to update student profile", extra={"student_id": profile.student_id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update student profile: {str(e)}"
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+# app.db builds its engines at import time; no connection is opened by these tests
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/test")
+
+from app.routers import nlp_router
+
+
+def _fake_score_matrix(scores):
+    """Stand-in for glove_comprehensive_score_matrix returning fixed scores"""
+    def score_matrix(*args):
+        zeros = np.zeros_like(scores)
+        return scores, {
+            "skill_score": scores,
+            "location_score": zeros,
+            "cgpa_score": zeros,
+            "weights": {"skill": 1.0, "location": 0.0, "cgpa": 0.0},
+        }
+    return score_matrix
+
+
+def test_student_with_exhausted_top_k_falls_back_to_lower_ranked_job(monkeypatch):
+    # Both students rank internship 10 first; it has one seat, so with K=1
+    # student 2 has nothing left in the pruned pass but internship 20 is still open
+    scores = np.array([
+        [0.9, 0.5],
+        [0.8, 0.3],
+    ])
+    monkeypatch.setattr(nlp_router, "TOP_K_PER_STUDENT", 1)
+    monkeypatch.setattr(nlp_router, "glove_comprehensive_score_matrix", _fake_score_matrix(scores))
+
+    students = [
+        {"student_id": 1, "skills_text": "", "location_pref": "", "cgpa": None},
+        {"student_id": 2, "skills_text": "", "location_pref": "", "cgpa": None},
+    ]
+    job_info = {
+        10: {"req_skills_text": "", "location": "", "min_cgpa": 0.0, "remaining": 1},
+        20: {"req_skills_text": "", "location": "", "min_cgpa": 0.0, "remaining": 1},
+    }
+
+    assigned = nlp_router._score_and_assign(students, [10, 20], job_info, 1.0, 0.0, 0.0)
+
+    assert assigned[1][0] == 10
+    assert assigned[2][0] == 20
+    assert assigned[2][1] == 0.3
+
+
+def test_pruned_pass_respects_threshold_and_capacity(monkeypatch):
+    # Student 2's only other job scores below the 0.2 cut-off, so they stay unassigned
+    scores = np.array([
+        [0.9, 0.5],
+        [0.8, 0.1],
+    ])
+    monkeypatch.setattr(nlp_router, "TOP_K_PER_STUDENT", 1)
+    monkeypatch.setattr(nlp_router, "glove_comprehensive_score_matrix", _fake_score_matrix(scores))
+
+    students = [
+        {"student_id": 1, "skills_text": "", "location_pref": "", "cgpa": None},
+        {"student_id": 2, "skills_text": "", "location_pref": "", "cgpa": None},
+    ]
+    job_info = {
+        10: {"req_skills_text": "", "location": "", "min_cgpa": 0.0, "remaining": 1},
+        20: {"req_skills_text": "", "location": "", "min_cgpa": 0.0, "remaining": 1},
+    }
+
+    assigned = nlp_router._score_and_assign(students, [10, 20], job_info, 1.0, 0.0, 0.0)
+
+    assert assigned == {1: (10, 0.9, assigned[1][2])}